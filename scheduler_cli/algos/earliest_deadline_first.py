@@ -1,8 +1,26 @@
 from collections import defaultdict
 from typing import List, Dict
 import click
+import numpy as np
 import pandas as pd
-import math
+from numba import njit
+
+from algos.job_routes import first_pair_rows
+
+
+@njit(cache=True)
+def _first_window(capacity, slot_ids, slots_needed, per_slot, deadline_slot):
+    """Start index of the earliest run of slots_needed slots ending by deadline_slot
+    that all have per_slot seconds free, -1 if there is none. slot_ids is sorted, so one pass
+    tracking the current run of free slots replaces re-checking every window from its start."""
+    run = 0
+    for s in range(len(slot_ids)):
+        if slot_ids[s] > deadline_slot:
+            break  # Later windows can't meet the deadline either
+        run = run + 1 if capacity[s] >= per_slot else 0
+        if run == slots_needed:
+            return s - run + 1
+    return -1
 
 
 class EarliestDeadlineFirst:
@@ -12,28 +30,50 @@ class EarliestDeadlineFirst:
 
         # Get unique time slots from forecast_id
         self.time_slots = sorted([int(x) for x in associations_df['forecast_id'].unique()])
+        self.max_slot = max(self.time_slots)
+        self.slot_arr = np.asarray(self.time_slots, dtype=np.int64)
 
-        # Capacity is now per route_key
-        self.capacity = {
-            row['route_key']: {slot: 3600.0 for slot in self.time_slots}
-            for _, row in associations_df.drop_duplicates(['route_key']).iterrows()
-        }
+        # Capacity is now per route_key, one row per route and one column per slot
+        self.route_idx = {route_key: i for i, route_key in enumerate(associations_df['route_key'].unique())}
+        self.capacity = np.full((len(self.route_idx), len(self.time_slots)), 3600.0)
 
         # Precompute job metrics for each route
         self.job_metrics = self._precompute_job_metrics()
 
+        # Transfer time in seconds per (job code, route_idx), read on every slot search. Pairs with no
+        # data or a non-positive transfer_time are marked unschedulable.
+        self.job_code = {job_id: i for i, job_id in enumerate(self.job_metrics)}
+        self.transfer_seconds = np.zeros((len(self.job_code), len(self.route_idx)))
+        self.schedulable = np.zeros((len(self.job_code), len(self.route_idx)), dtype=bool)
+        for job_id, routes in self.job_metrics.items():
+            for route_key, metrics in routes.items():
+                j, r = self.job_code[job_id], self.route_idx[route_key]
+                self.transfer_seconds[j, r] = metrics['transfer_time_hours'] * 3600  # Convert hours to seconds
+                self.schedulable[j, r] = metrics['transfer_time'] > 0
+
+        # Deadlines as an array so plan() orders jobs with one argsort, missing deadlines sort last
+        self.deadline_arr = np.array(
+            [float('inf') if job.get('deadline') is None else int(job['deadline']) for job in job_list], dtype=np.float64
+        )
+
     def _precompute_job_metrics(self):
-        """Precompute metrics for each job-route pair"""
+        """Precompute metrics for each job-route pair from the first row of each (job_id, route_key) pair"""
+        first_idx, _ = first_pair_rows(self.df)
+        first_rows = self.df.iloc[first_idx].reindex(columns=[
+            'job_id', 'route_key', 'transfer_time', 'carbon_emissions', 'throughput', 'transfer_time_hours',
+            'source_node', 'destination_node'
+        ], fill_value=0)
+
         metrics = defaultdict(dict)
-        for (job_id, route_key), group in self.df.groupby(['job_id', 'route_key']):
-            first_row = group.iloc[0]
+        for job_id, route_key, transfer_time, carbon, throughput, hours, source, destination in first_rows.itertuples(
+                index=False, name=None):
             metrics[job_id][route_key] = {
-                'transfer_time': float(first_row['transfer_time']),
-                'carbon_emissions': float(first_row.get('carbon_emissions', 0)),
-                'throughput': float(first_row.get('throughput', 0)),
-                'transfer_time_hours': float(first_row.get('transfer_time_hours', 0)),
-                'source_node': first_row['source_node'],
-                'destination_node': first_row['destination_node']
+                'transfer_time': float(transfer_time),
+                'carbon_emissions': float(carbon),
+                'throughput': float(throughput),
+                'transfer_time_hours': float(hours),
+                'source_node': source,
+                'destination_node': destination
             }
         return metrics
 
@@ -41,14 +81,13 @@ class EarliestDeadlineFirst:
         """Get metrics for a specific job-route pair"""
         return self.job_metrics.get(job_id, {}).get(route_key)
 
-    def _find_available_slots(self, job_id, route_key, deadline):
+    def _find_available_slots(self, job_code, route_code, deadline):
         """Find consecutive slots that can accommodate the job before deadline"""
-        metrics = self._get_job_metrics(job_id, route_key)
-        if not metrics or metrics['transfer_time'] <= 0:
+        if not self.schedulable[job_code, route_code]:
             return []
 
-        transfer_time = metrics['transfer_time_hours'] * 3600  # Convert hours to seconds
-        slots_needed = math.ceil(transfer_time / 3600)  # Round up to full slots
+        transfer_time = float(self.transfer_seconds[job_code, route_code])
+        slots_needed = int(-(-transfer_time // 3600))  # Round up to full slots
 
         # Handle deadline
         try:
@@ -56,60 +95,46 @@ class EarliestDeadlineFirst:
         except (ValueError, TypeError):
             deadline = None
 
-        max_slot = max(self.time_slots)
-        deadline_slot = min(deadline, max_slot) if deadline is not None else max_slot
+        deadline_slot = min(deadline, self.max_slot) if deadline is not None else self.max_slot
 
-        # Find earliest possible slots that meet deadline
-        for start_slot_idx in range(len(self.time_slots) - slots_needed + 1):
-            end_slot_idx = start_slot_idx + slots_needed - 1
-            if self.time_slots[end_slot_idx] > deadline_slot:
-                continue  # Doesn't meet deadline
-
-            # Check capacity in all required slots
-            can_allocate = all(
-                self.capacity[route_key][self.time_slots[slot_idx]] >= transfer_time / slots_needed
-                for slot_idx in range(start_slot_idx, end_slot_idx + 1)
-            )
-
-            if can_allocate:
-                return list(range(start_slot_idx, end_slot_idx + 1))
-
-        return []
+        # Find earliest possible slots that meet deadline and have capacity in all of them
+        per_slot = transfer_time / slots_needed if slots_needed else 0.0
+        start_slot_idx = _first_window(self.capacity[route_code], self.slot_arr, slots_needed, per_slot, deadline_slot)
+        if start_slot_idx < 0:
+            return []
+        return list(range(start_slot_idx, start_slot_idx + slots_needed))
 
     def _add_schedule_entry(self, job, route_key, slot_indices, metrics, schedule):
         """Add an entry to the schedule and update capacities"""
         transfer_time = metrics['transfer_time_hours'] * 3600  # Convert hours to seconds
         time_per_slot = transfer_time / len(slot_indices)
         allocated_fraction = time_per_slot / 3600  # Fraction of the hour slot used
-
-        for slot_idx in slot_indices:
-            slot_time = self.time_slots[slot_idx]
-            self.capacity[route_key][slot_time] -= time_per_slot
-
-            schedule.append({
-                'job_id': job['id'],
-                'route': route_key,
-                'source_node': metrics['source_node'],
-                'destination_node': metrics['destination_node'],
-                'forecast_id': slot_time,
-                'allocated_fraction': allocated_fraction,
-                'allocated_time': time_per_slot,
-                'carbon_emissions': metrics['carbon_emissions'],
-                'throughput': metrics['throughput'],
-                'transfer_time': metrics['transfer_time'],  # Total job time
-                'deadline': job.get('deadline'),
-                'extendable': job.get('extendable', False)
-            })
+        self.capacity[self.route_idx[route_key], slot_indices] -= time_per_slot
+
+        # Extend each output column once per entry instead of appending a dict per slot
+        n = len(slot_indices)
+        schedule['job_id'].extend([job['id']] * n)
+        schedule['route'].extend([route_key] * n)
+        schedule['source_node'].extend([metrics['source_node']] * n)
+        schedule['destination_node'].extend([metrics['destination_node']] * n)
+        schedule['forecast_id'].extend(self.time_slots[slot_idx] for slot_idx in slot_indices)
+        schedule['allocated_fraction'].extend([allocated_fraction] * n)
+        schedule['allocated_time'].extend([time_per_slot] * n)
+        schedule['carbon_emissions'].extend([metrics['carbon_emissions']] * n)
+        schedule['throughput'].extend([metrics['throughput']] * n)
+        schedule['transfer_time'].extend([metrics['transfer_time']] * n)  # Total job time
+        schedule['deadline'].extend([job.get('deadline')] * n)
+        schedule['extendable'].extend([job.get('extendable', False)] * n)
 
     def plan(self):
         """Generate pure EDF schedule (deadline is only priority)"""
-        schedule = []
+        schedule = {col: [] for col in (
+            'job_id', 'route', 'source_node', 'destination_node', 'forecast_id', 'allocated_fraction',
+            'allocated_time', 'carbon_emissions', 'throughput', 'transfer_time', 'deadline', 'extendable'
+        )}
 
         # Sort jobs STRICTLY by deadline (earliest first)
-        jobs_sorted = sorted(
-            self.job_list,
-            key=lambda x: int(x['deadline']) if x.get('deadline') is not None else float('inf')
-        )
+        jobs_sorted = [self.job_list[i] for i in np.argsort(self.deadline_arr, kind='stable')]
 
         for idx, job in enumerate(jobs_sorted):
             job_id = job['id']
@@ -118,7 +143,7 @@ class EarliestDeadlineFirst:
 
             # Try all possible routes for this job
             for route_key in self.job_metrics.get(job_id, {}).keys():
-                slot_indices = self._find_available_slots(job_id, route_key, deadline)
+                slot_indices = self._find_available_slots(self.job_code[job_id], self.route_idx[route_key], deadline)
                 if slot_indices:
                     metrics = self._get_job_metrics(job_id, route_key)
                     self._add_schedule_entry(job, route_key, slot_indices, metrics, schedule)
@@ -128,4 +153,12 @@ class EarliestDeadlineFirst:
             if not scheduled:
                 click.secho(f"‼️ URGENT: Failed to schedule Job {job_id} (deadline: {deadline})", fg='red')
 
-        return pd.DataFrame(schedule)
\ No newline at end of file
+        # Compact dtypes: repeated route/node names as categoricals, ids as int32. Times and
+        # emissions stay float64 since bytes are later derived from throughput * time.
+        return pd.DataFrame(schedule).astype({
+            'job_id': np.int32,
+            'forecast_id': np.int32,
+            'route': 'category',
+            'source_node': 'category',
+            'destination_node': 'category'
+        })
\ No newline at end of file
@@ -4,6 +4,7 @@ import torch.optim as optim
 from torch_geometric.nn import GATv2Conv
 import torch.nn.functional as F
 from torch_geometric.data import Data
+import numpy as np
 import pandas as pd
 
 
@@ -21,7 +22,8 @@ class GnnPlanner:
         self.max_slot = max(self.time_slots)
         self.epochs = 100
         self.data, self.job_map, self.route_map = self.prepare_gnn_data()
-        self.model = ScheduleGNN()
+        self.late_edges = self._late_edge_mask()
+        self.model = ScheduleGNN(edge_feat_dim=self.data.edge_attr.size(1))
 
         # Store throughput (bps) and carbon for output calculations
         self.throughput = dict(zip(
@@ -39,40 +41,50 @@ class GnnPlanner:
         print(schedule.sort_values(['job_id', 'forecast_id']))
         print(f"\nTotal Carbon: {schedule['carbon_emissions'].sum():.2f}")
         print(f"Total Allocated Bytes: {schedule['allocated_bytes'].sum():.2f}")
+        return schedule
 
     def prepare_gnn_data(self):
+        job_ids = [job['id'] for job in self.job_list]
+        job_map = {job_id: idx for idx, job_id in enumerate(job_ids)}
+        deadlines = np.array([self.job_deadlines[job_id] for job_id in job_ids], dtype=np.float64)
+
         # Job nodes: [deadline, size_remaining, is_completed]
         job_nodes = torch.tensor([
             [self.job_deadlines[job_id], self.job_sizes[job_id], 0.0]
-            for job_id in self.job_map.keys()
+            for job_id in job_ids
         ], dtype=torch.float)
 
-        # Route-time nodes: [forecast_id, throughput] (carbon is NOT here!)
-        route_time_nodes = []
-        route_time_map = {}  # (route_key, forecast_id) -> node_id
-        for (route, time), throughput in self.throughput.items():
-            route_time_nodes.append([time, throughput])
-            route_time_map[(route, time)] = len(job_nodes) + len(route_time_nodes) - 1
-
-        # Edges: Connect jobs to route-time slots (if time ≤ deadline)
-        edge_index = []
-        edge_attr = []
-        for job_id, job_idx in self.job_map.items():
-            deadline = self.job_deadlines[job_id]
-            for (route, time), throughput in self.throughput.items():
-                if time <= deadline:
-                    rt_node = route_time_map.get((route, time))
-                    if rt_node is not None:
-                        # Get carbon on-demand (from SimGrid or cached)
-                        carbon = self.get_carbon(job_id, route, time)  # Implement this!
-                        edge_index.append((job_idx, rt_node))
-                        edge_attr.append([carbon, throughput])
-
-        x = torch.cat([job_nodes, torch.tensor(route_time_nodes, dtype=torch.float)])
-        edge_index = torch.tensor(edge_index, dtype=torch.long).t().contiguous()
-        edge_attr = torch.tensor(edge_attr, dtype=torch.float)
-
-        return Data(x=x, edge_index=edge_index, edge_attr=edge_attr)
+        # Route-time nodes: [forecast_id, throughput] (carbon is NOT here!), one per (route_key, forecast_id)
+        df = self.associations_df
+        rt_codes, rt_keys = pd.factorize(pd.MultiIndex.from_arrays([df['route_key'], df['forecast_id']]))
+        rt_time = np.asarray(rt_keys.get_level_values(1), dtype=np.float64)
+        rt_throughput = np.zeros(len(rt_keys))
+        rt_throughput[rt_codes] = df['throughput'].to_numpy(dtype=np.float64)
+        route_time_map = {key: len(job_ids) + i for i, key in enumerate(rt_keys)}  # (route_key, forecast_id) -> node_id
+
+        # Dense job x route-time carbon table, filled once instead of looked up per edge
+        job_pos = df['job_id'].map(job_map)
+        known = job_pos.notna().to_numpy()
+        carbon = np.zeros((len(job_ids), len(rt_keys)))
+        carbon[job_pos[known].to_numpy(dtype=np.int64), rt_codes[known]] = df['carbon_emissions'].to_numpy(dtype=np.float64)[known]
+
+        # Edges: Connect jobs to route-time slots (if time ≤ deadline), job-major like the node order
+        edge_job, edge_rt = np.nonzero(rt_time[None, :] <= deadlines[:, None])
+        edge_index = torch.from_numpy(np.stack([edge_job, edge_rt + len(job_ids)])).long().contiguous()
+        edge_attr = torch.tensor(np.column_stack([carbon[edge_job, edge_rt], rt_throughput[edge_rt]]), dtype=torch.float)
+
+        # Padded to the job node width so both node types share node_feat_dim
+        route_time_nodes = torch.tensor(
+            np.column_stack([rt_time, rt_throughput, np.zeros(len(rt_keys))]), dtype=torch.float
+        )
+        x = torch.cat([job_nodes, route_time_nodes])
+
+        # Job nodes come first, ScheduleGNN encodes the two node types separately
+        job_mask = torch.zeros(x.size(0), dtype=torch.bool)
+        job_mask[:len(job_ids)] = True
+
+        data = Data(x=x, edge_index=edge_index, edge_attr=edge_attr, job_mask=job_mask, route_mask=~job_mask)
+        return data, job_map, route_time_map
 
     def gnn_optimize(self):
         """End-to-end GNN optimization pipeline with fractional allocations"""
@@ -80,7 +92,9 @@ class GnnPlanner:
 
         # Inverse mappings
         idx_to_job = {v: k for k, v in self.job_map.items()}
-        idx_to_route = {v: k for k, v in self.route_map.items()}
+
+        # Loss inputs that don't change across epochs, picked out of the graph once
+        train_carbon = self.data.edge_attr[:, 0]
 
         # Training loop
         for epoch in range(self.epochs):
@@ -90,10 +104,11 @@ class GnnPlanner:
             # Forward pass
             allocation_scores = self.model(self.data)
 
-            # Custom loss function
-            carbon_loss = (allocation_scores.sigmoid() * self.data.edge_attr[:, 0]).mean()
-            deadline_loss = self.calculate_deadline_loss(allocation_scores.sigmoid())
-            utilization_loss = -allocation_scores.sigmoid().mean()
+            # Custom loss function, all three terms share one sigmoid
+            allocations = allocation_scores.sigmoid()
+            carbon_loss = (allocations * train_carbon).mean()
+            deadline_loss = self.calculate_deadline_loss(allocations)
+            utilization_loss = -allocations.mean()
 
             # Combine losses with proper scaling
             loss = carbon_loss + deadline_loss + 0.5 * utilization_loss
@@ -106,83 +121,101 @@ class GnnPlanner:
             if epoch % 10 == 0:
                 print(f"Epoch {epoch}, Loss: {loss.item():.4f}")
 
-        # Generate final schedule with fractional allocations
-        schedule = []
+        # Generate final schedule with fractional allocations. Each edge is used at most once, so the
+        # edge count bounds the rows and the output columns are preallocated and filled by a cursor.
+        n_edges = self.data.edge_index.size(1)
+        sched_job = np.empty(n_edges, dtype=object)
+        sched_edge = np.empty(n_edges, dtype=np.int64)
+        sched_fraction = np.empty(n_edges)
+        sched_bytes = np.empty(n_edges)
+        sched_carbon = np.empty(n_edges)
+        sched_completed = np.empty(n_edges, dtype=bool)
+        n = 0
         job_progress = {job_id: 0.0 for job_id in self.job_map.keys()}
 
         with torch.no_grad():
             allocation_scores = self.model(self.data).sigmoid()
 
-            for job_idx, job_id in idx_to_job.items():
-                total_size = self.job_sizes[job_id]
-                remaining = total_size - job_progress[job_id]
-
-                if remaining <= 0:
-                    continue
-
-                # Get all possible allocations for this job
-                job_edges_mask = (self.data.edge_index[0] == job_idx)
-                job_edges = job_edges_mask.nonzero().squeeze()
+        # Plain arrays for the greedy pass, so each edge is scalar reads rather than tensor ops
+        scores = allocation_scores.cpu().numpy()
+        edge_index = self.data.edge_index.cpu().numpy()
+        edge_carbon = self.data.edge_attr[:, 0].cpu().numpy().astype(np.float64)
+        edge_throughput = self.data.edge_attr[:, 1].cpu().numpy().astype(np.float64)
+        edge_slot_bytes = edge_throughput * 3600 / 8  # Convert bps to bytes/hour
 
-                if job_edges.numel() == 0:  # More robust check for empty edges
-                    continue
-                if job_edges.dim() == 0:  # Handle case with single edge
-                    job_edges = job_edges.unsqueeze(0)
+        # Route and forecast of every edge's route-time node, gathered once instead of a dict lookup per edge
+        node_route = np.empty(self.data.num_nodes, dtype=object)
+        node_forecast = np.zeros(self.data.num_nodes, dtype=np.int64)
+        for (route_key, forecast), node in self.route_map.items():
+            node_route[node] = route_key
+            node_forecast[node] = int(forecast)
 
-                # Sort edges by score
-                sorted_edges = job_edges[torch.argsort(allocation_scores[job_edges], descending=True)]
+        # Edges are built job-major, so each job's edges are one contiguous range found from offsets
+        edge_offsets = np.concatenate(([0], np.cumsum(np.bincount(edge_index[0], minlength=len(self.job_map)))))
 
-                for edge_idx in sorted_edges:
-                    if remaining <= 0:
-                        break
+        for job_idx, job_id in idx_to_job.items():
+            total_size = self.job_sizes[job_id]
+            remaining = total_size - job_progress[job_id]
 
-                    src, dst = self.data.edge_index[:, edge_idx]
-                    route_key, forecast = idx_to_route[dst.item()]
+            if remaining <= 0:
+                continue
 
-                    # Calculate maximum possible allocation
-                    throughput_bps = self.data.edge_attr[edge_idx, 2]
-                    max_possible_bytes = min(remaining, throughput_bps * 3600 / 8)  # Convert bps to bytes/hour
+            # Get all possible allocations for this job
+            job_edges = np.arange(edge_offsets[job_idx], edge_offsets[job_idx + 1])
+            if job_edges.size == 0:
+                continue
 
-                    # Avoid division by zero
-                    denominator = throughput_bps * 3600 / 8
-                    if denominator < 1e-6:  # Small epsilon to prevent division by zero
-                        continue
+            # Sort edges by score
+            sorted_edges = job_edges[np.argsort(-scores[job_edges], kind='stable')]
 
-                    x_val = min(1.0, max_possible_bytes / denominator)
+            for edge_idx in sorted_edges.tolist():
+                if remaining <= 0:
+                    break
 
-                    if x_val > 0.01:  # Threshold for meaningful allocations
-                        allocated_bytes = x_val * throughput_bps * 3600 / 8
-                        schedule.append({
-                            'job_id': job_id,
-                            'forecast_id': int(forecast),
-                            'route_key': route_key,
-                            'allocated_fraction': x_val,
-                            'allocated_bytes': allocated_bytes,
-                            'carbon_emissions': x_val * self.data.edge_attr[edge_idx, 0],
-                            'completed': (job_progress[job_id] + allocated_bytes) >= total_size * 0.99
-                        })
+                # Calculate maximum possible allocation
+                denominator = edge_slot_bytes[edge_idx]
+                max_possible_bytes = min(remaining, denominator)
 
-                        job_progress[job_id] += allocated_bytes
-                        remaining = total_size - job_progress[job_id]
+                # Avoid division by zero
+                if denominator < 1e-6:  # Small epsilon to prevent division by zero
+                    continue
 
-        return pd.DataFrame(schedule)
+                x_val = min(1.0, max_possible_bytes / denominator)
+
+                if x_val > 0.01:  # Threshold for meaningful allocations
+                    allocated_bytes = x_val * denominator
+                    sched_job[n] = job_id
+                    sched_edge[n] = edge_idx
+                    sched_fraction[n] = x_val
+                    sched_bytes[n] = allocated_bytes
+                    sched_carbon[n] = x_val * edge_carbon[edge_idx]
+                    sched_completed[n] = (job_progress[job_id] + allocated_bytes) >= total_size * 0.99
+                    n += 1
+
+                    job_progress[job_id] += allocated_bytes
+                    remaining = total_size - job_progress[job_id]
+
+        return pd.DataFrame({
+            'job_id': sched_job[:n].tolist(),
+            'forecast_id': node_forecast[edge_index[1, sched_edge[:n]]],
+            'route_key': node_route[edge_index[1, sched_edge[:n]]].tolist(),
+            'allocated_fraction': sched_fraction[:n],
+            'allocated_bytes': sched_bytes[:n],
+            'carbon_emissions': sched_carbon[:n],
+            'completed': sched_completed[:n]
+        })
 
     def calculate_deadline_loss(self, allocations):
         """Penalize allocations that exceed job deadlines"""
-        deadline_loss = 0.0
-        for job_idx, job_id in self.job_map.items():
-            job_edges = (self.data.edge_index[0] == job_idx).nonzero().squeeze()
-            if job_edges.dim() == 0:
-                continue
-
-            deadline = self.data.x[job_idx, 0]
-            late_allocations = allocations[job_edges] * (self.data.edge_attr[job_edges, 1] > deadline).float()
-            deadline_loss += late_allocations.sum()
-
-        return deadline_loss / len(self.job_map)
-
-    def get_carbon(self, job_id, route, time):
-        pass
+        return (allocations * self.late_edges).sum() / len(self.job_map)
+
+    def _late_edge_mask(self):
+        """Float mask of edges counted by the deadline loss, fixed for the graph so built once
+        instead of re-scanning edge_index per job every epoch. Jobs with a single edge are skipped."""
+        src = self.data.edge_index[0]
+        edges_per_job = torch.bincount(src, minlength=len(self.job_map))
+        late = self.data.edge_attr[:, 1] > self.data.x[src, 0]
+        return (late & (edges_per_job[src] != 1)).float()
 
 
 class ScheduleGNN(nn.Module):
@@ -1,5 +1,33 @@
 from typing import List, Dict
+import numpy as np
 import pandas as pd
+from numba import njit
+
+
+@njit(cache=True)
+def _fill_slots(capacity, slot_ids, deadline, remaining_time):
+    """Take capacity from the earliest slots up to the deadline until the transfer fits.
+    Returns the seconds taken per slot and whether it fit, a partial fill is rolled back"""
+    taken = np.zeros(capacity.shape[0])
+    for s in range(capacity.shape[0]):
+        if slot_ids[s] > deadline:
+            continue
+
+        if remaining_time <= 0:
+            break
+
+        available = capacity[s]
+        if available > 0:
+            alloc = min(available, remaining_time)
+            capacity[s] -= alloc
+            taken[s] = alloc
+            remaining_time -= alloc
+
+    if remaining_time > 0:
+        for s in range(capacity.shape[0]):
+            capacity[s] += taken[s]
+        return taken, False
+    return taken, True
 
 
 class CarbonAwarePlanner:
@@ -9,38 +37,47 @@ class CarbonAwarePlanner:
         self.job_list = jobs
         self.reverse_sort = (self.mode == 'max')
 
-        # Initialize capacity tracking (in seconds)
+        # Initialize capacity tracking (in seconds), one row per route and one column per slot
         self.time_slots = sorted([int(x) for x in associations_df['forecast_id'].unique()])
-        self.capacity = {
-            route_key: {slot: 3600.0 for slot in self.time_slots}
-            for route_key in associations_df['route_key'].unique()
-        }
+        self.slot_arr = np.asarray(self.time_slots, dtype=np.float64)
+        self.route_idx = {route_key: i for i, route_key in enumerate(associations_df['route_key'].unique())}
+        self.capacity = np.full((len(self.route_idx), len(self.time_slots)), 3600.0)
 
         # Precompute job metrics
         self.job_metrics = self._precompute_job_metrics()
+
+        # Carbon metrics never change during planning, so the route preference per job is fixed
+        self.routes_sorted = {
+            job_id: sorted(routes.items(), key=lambda x: x[1]['carbon_emissions'], reverse=self.reverse_sort)
+            for job_id, routes in self.job_metrics.items()
+        }
         self.job_deadlines = {job['id']: job.get('deadline') for job in jobs}
 
-        # Sort jobs by deadline (earliest first)
-        self.jobs = sorted(
-            jobs,
-            key=lambda x: int(x['deadline']) if x.get('deadline') is not None else float('inf')
+        # Sort jobs by deadline (earliest first), jobs without a deadline go last
+        deadlines = np.array(
+            [int(j['deadline']) if j.get('deadline') is not None else np.inf for j in jobs],
+            dtype=np.float64
         )
+        self.jobs = [jobs[i] for i in np.argsort(deadlines, kind='stable')]
 
     def _precompute_job_metrics(self):
-        """Precompute metrics for each job-route pair"""
+        """Precompute metrics for each job-route pair, duplicate pairs keep their first row"""
+        first_rows = self.df.drop_duplicates(['job_id', 'route_key']).sort_values(
+            ['job_id', 'route_key'], kind='stable'
+        )
+        columns = ['job_id', 'route_key', 'source_node', 'destination_node', 'carbon_emissions', 'throughput',
+                   'transfer_time_hours']
+
         metrics = {}
-        for (job_id, route_key), group in self.df.groupby(['job_id', 'route_key']):
-            if job_id not in metrics:
-                metrics[job_id] = {}
-            first_row = group.iloc[0]
-            total_transfer_time = float(first_row['transfer_time_hours']) * 3600  # in seconds
-            metrics[job_id][route_key] = {
-                'source_node': first_row['source_node'],
-                'destination_node': first_row['destination_node'],
-                'carbon_emissions': float(first_row['carbon_emissions']),
-                'throughput': float(first_row['throughput']),
-                'transfer_time': total_transfer_time,
-                'transfer_time_hours': float(first_row['transfer_time_hours'])
+        for job_id, route_key, source, destination, carbon, throughput, hours in first_rows[columns].itertuples(
+                index=False, name=None):
+            metrics.setdefault(job_id, {})[route_key] = {
+                'source_node': source,
+                'destination_node': destination,
+                'carbon_emissions': float(carbon),
+                'throughput': float(throughput),
+                'transfer_time': float(hours) * 3600,  # in seconds
+                'transfer_time_hours': float(hours)
             }
         return metrics
 
@@ -64,62 +101,24 @@ class CarbonAwarePlanner:
             return False
 
         deadline = self.job_deadlines[job_id]
-        routes = self.job_metrics[job_id]
-
-        # Sort routes by carbon preference
-        routes_sorted = sorted(
-            routes.items(),
-            key=lambda x: x[1]['carbon_emissions'],
-            reverse=self.reverse_sort
-        )
-
-        for route_key, metrics in routes_sorted:
-            remaining_time = metrics['transfer_time']
-            allocated_slots = []
-
-            # Find all available slots before deadline
-            for slot_id in sorted(self.time_slots):
-                if deadline is not None and slot_id > deadline:
-                    continue
-
-                if remaining_time <= 0:
-                    break
-
-                available = self.capacity[route_key][slot_id]
-                if available > 0:
-                    alloc = min(available, remaining_time)
-                    self.capacity[route_key][slot_id] -= alloc
-                    allocated_slots.append({
-                        'slot_id': slot_id,
-                        'time_used': alloc,
-                        'metrics': metrics
-                    })
-                    remaining_time -= alloc
-
-            if remaining_time <= 0:
-                # Job fully allocated - add to schedule
-                for alloc in allocated_slots:
-                    self._add_schedule_entry(
-                        job,
-                        route_key,
-                        alloc['slot_id'],
-                        alloc['time_used'],
-                        alloc['metrics'],
-                        schedule
-                    )
+        deadline = float(deadline) if deadline is not None else np.inf
+
+        for route_key, metrics in self.routes_sorted[job_id]:
+            taken, fits = _fill_slots(
+                self.capacity[self.route_idx[route_key]], self.slot_arr, deadline, metrics['transfer_time']
+            )
+            if fits:
+                # Job fully allocated - add to schedule, slot fractions are divided out in one pass
+                used = np.flatnonzero(taken)
+                for s, time_used, fraction in zip(used.tolist(), taken[used].tolist(), (taken[used] / 3600).tolist()):
+                    self._add_schedule_entry(job, route_key, self.time_slots[s], time_used, fraction, metrics, schedule)
                 return True
-            else:
-                # Roll back partial allocation
-                for alloc in allocated_slots:
-                    self.capacity[route_key][alloc['slot_id']] += alloc['time_used']
 
         return False
 
     def _add_schedule_entry(self, job: Dict, route_key: str, slot_id: int,
-                          time_used: float, metrics: Dict, schedule: List):
-        """Add an allocation to the schedule"""
-        allocated_fraction = time_used / 3600  # Fraction of slot used
-
+                          time_used: float, allocated_fraction: float, metrics: Dict, schedule: List):
+        """Add an allocation to the schedule, allocated_fraction is the fraction of the slot used"""
         schedule.append({
             'job_id': job['id'],
             'route': route_key,
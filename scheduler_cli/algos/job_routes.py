@@ -0,0 +1,15 @@
+import numpy as np
+import pandas as pd
+
+
+def first_pair_rows(df):
+    """Positions of the first row of each (job_id, route_key) pair in df, ordered by job_id then route_key like a
+    groupby, along with each position's job code. Rows with a missing job_id or route_key are skipped."""
+    job_codes, _ = pd.factorize(df['job_id'], sort=True)
+    route_codes, route_keys = pd.factorize(df['route_key'], sort=True)
+    # Missing values factorize to -1 and would collide with a neighbouring pair in the combined key
+    valid = np.flatnonzero((job_codes >= 0) & (route_codes >= 0))
+    combo = job_codes[valid] * len(route_keys) + route_codes[valid]
+    _, first = np.unique(combo, return_index=True)
+    first_idx = valid[first]
+    return first_idx, job_codes[first_idx]
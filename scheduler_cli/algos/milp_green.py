@@ -1,5 +1,37 @@
+import os
+
+import highspy
+import numpy as np
 import pulp
 import pandas as pd
+from scipy import sparse
+
+
+def _valid_combinations(associations_df, job_list, routes, max_slot):
+    """First association row per (job, slot, route) within the job's deadline, ordered by job, slot, route.
+    Rows with no throughput can't move any bytes and are left out of the model."""
+    jobs = pd.DataFrame({
+        'job_id': [j['id'] for j in job_list],
+        'deadline': [j.get('deadline', max_slot) for j in job_list],
+        'job_order': np.arange(len(job_list))
+    })
+    df = associations_df.drop_duplicates(['job_id', 'forecast_id', 'route_key']).merge(jobs, on='job_id')
+    df = df[(df['forecast_id'] <= df['deadline']) & (df['throughput'] > 0)]
+    df = df.assign(route_order=df['route_key'].map({r: i for i, r in enumerate(routes)}))
+    df = df.sort_values(['job_order', 'forecast_id', 'route_order'], kind='stable')
+    return df
+
+
+def _coverage_capacity_matrices(job_idx, n_jobs, tr_idx, slot_bytes, transfer_time, bytes_needed):
+    """Job coverage rows (scaled by job size, so solvers see O(1) coefficients) and (slot, route) capacity
+    rows over the x variables as CSR, plus the per-job scale"""
+    n_x = len(job_idx)
+    x_ids = np.arange(n_x)
+    n_tr = int(tr_idx.max()) + 1 if n_x else 0
+    scale = np.where(bytes_needed > 0, bytes_needed, 1.0)
+    coverage = sparse.csr_matrix((slot_bytes / scale[job_idx], (job_idx, x_ids)), shape=(n_jobs, n_x))
+    capacity = sparse.csr_matrix((transfer_time, (tr_idx, x_ids)), shape=(n_tr, n_x))
+    return coverage, capacity, scale
 
 
 class LexicographicGreenPlanner:
@@ -10,112 +42,121 @@ class LexicographicGreenPlanner:
         self.routes = associations_df['route_key'].unique()
         self.max_slot = max(self.time_slots)
 
-        # Precompute valid combinations
-        self.valid = []
-        self.carbon = {}
-        self.throughput = {}
-        self.transfer_time = {}
-
-        for j in job_list:
-            job_id = j['id']
-            deadline = j.get('deadline', self.max_slot)
-            for t in self.time_slots:
-                if t > deadline:
-                    continue
-                for r in self.routes:
-                    mask = (
-                            (self.df['job_id'] == job_id) &
-                            (self.df['forecast_id'] == t) &
-                            (self.df['route_key'] == r)
-                    )
-                    if not self.df[mask].empty:
-                        data = self.df[mask].iloc[0]
-                        key = (job_id, t, r)
-                        self.valid.append(key)
-                        self.carbon[key] = float(data['carbon_emissions'])
-                        self.throughput[key] = float(data['throughput']) / 8  # bytes/sec
-                        self.transfer_time[key] = float(data['transfer_time'])
+        # Precompute valid combinations, metrics are stored column-wise in the order of self.valid
+        valid = _valid_combinations(associations_df, job_list, self.routes, self.max_slot)
+        self.valid = list(zip(valid['job_id'].tolist(), valid['forecast_id'].tolist(), valid['route_key'].tolist()))
+
+        self.carbon_arr = valid['carbon_emissions'].to_numpy(dtype=np.float64)
+        self.throughput_arr = valid['throughput'].to_numpy(dtype=np.float64) / 8  # bytes/sec
+        self.slot_bytes_arr = 3600 * self.throughput_arr  # bytes moved by a fully used slot
+        self.transfer_time_arr = valid['transfer_time'].to_numpy(dtype=np.float64)
+        self.cost = self.carbon_arr.tolist()  # stage 2 objective coefficients, aligned with x
+
+        # Row positions of each variable in the job and (slot, route) constraint families
+        self.job_ids = list(self.jobs)
+        self.job_idx_arr = valid['job_id'].map({j: k for k, j in enumerate(self.job_ids)}).to_numpy(dtype=np.int64)
+        self.tr_idx_arr = valid.groupby(['forecast_id', 'route_key'], sort=False).ngroup().to_numpy()
+        self.job_id_arr = valid['job_id'].to_numpy()
+        self.forecast_id_arr = valid['forecast_id'].to_numpy()
+        self.route_arr = valid['route_key'].to_numpy(dtype=object)
 
         # Initialize models
         self.job_model = pulp.LpProblem("MaxJobs_Stage", pulp.LpMaximize)
         self.full_model = pulp.LpProblem("MinCarbon_Stage", pulp.LpMinimize)
 
-        # Variables
-        self.x = pulp.LpVariable.dicts("x", self.valid, 0, 1, pulp.LpContinuous)
-        self.y = pulp.LpVariable.dicts("y", self.jobs.keys(), pulp.LpBinary)
+        # Variables, x shares the flat index of the metric columns
+        self.x = [pulp.LpVariable(f"x_{i}", 0, 1, pulp.LpContinuous) for i in range(len(self.valid))]
+        self.y = pulp.LpVariable.dicts("y", self.jobs.keys(), cat=pulp.LpBinary)
+
+        # Solution vectors, filled in by plan()
+        self.x_values = np.zeros(len(self.valid))
+        self.y_values = np.zeros(len(self.job_ids))
 
     def plan(self):
+        rows = self._build_common_constraints()
+
         # STAGE 1: Maximize number of jobs completed
-        self._build_common_constraints()
-        self.job_model += pulp.lpSum(self.y[j] for j in self.jobs)
-        self.job_model.solve(pulp.PULP_CBC_CMD(msg=False))
-        max_jobs = int(pulp.value(self.job_model.objective))
+        for expr, sense, rhs in rows:
+            self.job_model += pulp.LpConstraint(expr, sense, rhs=rhs)
+        self.job_model += pulp.LpAffineExpression([(self.y[j], 1) for j in self.jobs])
+        self.job_model.solve(self._solver(msg=False))
+        max_jobs = int(round(pulp.value(self.job_model.objective)))
 
         # STAGE 2: Minimize carbon with job completion constraint
-        self._build_common_constraints()
-        self.full_model += pulp.lpSum(
-            self.x[key] * self.carbon[key] for key in self.valid
-        )
-        self.full_model += pulp.lpSum(self.y[j] for j in self.jobs) >= max_jobs
-        self.full_model.solve(pulp.PULP_CBC_CMD(msg=True, timeLimit=5000))
-
+        for expr, sense, rhs in rows:
+            self.full_model += pulp.LpConstraint(expr, sense, rhs=rhs)
+        self.full_model += pulp.LpAffineExpression(list(zip(self.x, self.cost)))
+        self.full_model += pulp.LpAffineExpression([(self.y[j], 1) for j in self.jobs]) >= max_jobs
+        self.full_model.solve(self._solver(msg=True, timeLimit=5000))
+
+        # Snapshot primal values once instead of resolving every variable through pulp.value
+        self.x_values = np.array([v.varValue or 0.0 for v in self.x], dtype=np.float64)
+        self.y_values = np.array([self.y[j].varValue or 0.0 for j in self.job_ids], dtype=np.float64)
         return self._generate_schedule()
 
+    @staticmethod
+    def _solver(**kwargs):
+        """HiGHS (binary, then the highspy bindings) when pulp can reach it, CBC otherwise"""
+        for solver_cls in (pulp.HiGHS_CMD, pulp.HiGHS):
+            solver = solver_cls(threads=os.cpu_count(), **kwargs)
+            if solver.available():
+                return solver
+        # CBC runs single threaded with its own gap unless told otherwise, match HiGHS' 0.01% default
+        return pulp.PULP_CBC_CMD(
+            threads=os.cpu_count(), gapRel=1e-4, presolve=True, cuts=True,
+            options=['heuristics on'], **kwargs
+        )
+
     def _build_common_constraints(self):
-        """Constraints shared by both models"""
+        """Constraint rows shared by both models as (expression, sense, rhs), assembled once from CSR rows"""
+        bytes_needed = np.array([self.jobs[j]['bytes'] for j in self.job_ids], dtype=np.float64)
+        coverage, capacity, scale = _coverage_capacity_matrices(
+            self.job_idx_arr, len(self.job_ids), self.tr_idx_arr,
+            self.slot_bytes_arr, self.transfer_time_arr, bytes_needed
+        )
+
         # Job completion constraints
-        for j in self.jobs:
-            bytes_needed = self.jobs[j]['bytes']
-            self.full_model += (
-                    pulp.lpSum(3600 * self.throughput[key] * self.x[key]
-                               for key in self.valid if key[0] == j) >= bytes_needed * self.y[j]
-            )
-
-        # Time slot capacity constraints
-        for t in self.time_slots:
-            for r in self.routes:
-                self.full_model += pulp.lpSum(
-                    self.x[key] * self.transfer_time[key]
-                    for key in self.valid if key[1] == t and key[2] == r
-                ) <= 3600
+        rows = []
+        y_coef = (-bytes_needed / scale).tolist()
+        for k, expr in enumerate(self._row_expressions(coverage)):
+            expr.addterm(self.y[self.job_ids[k]], y_coef[k])
+            rows.append((expr, pulp.LpConstraintGE, 0))
+
+        # Time slot capacity constraints, only (slot, route) pairs with variables
+        rows.extend((expr, pulp.LpConstraintLE, 3600) for expr in self._row_expressions(capacity))
+        return rows
+
+    def _row_expressions(self, matrix):
+        """One LpAffineExpression over x per row of a CSR matrix"""
+        indptr, indices, data = matrix.indptr.tolist(), matrix.indices.tolist(), matrix.data.tolist()
+        return [
+            pulp.LpAffineExpression([
+                (self.x[i], c) for i, c in zip(indices[indptr[k]:indptr[k + 1]], data[indptr[k]:indptr[k + 1]])
+            ])
+            for k in range(matrix.shape[0])
+        ]
 
     def _generate_schedule(self):
-        schedule = []
-        for key in self.valid:
-            j, t, r = key
-            x_val = pulp.value(self.x[key])
-            if x_val > 1e-6:
-                data = self.df[
-                    (self.df['job_id'] == j) &
-                    (self.df['forecast_id'] == t) &
-                    (self.df['route_key'] == r)
-                    ].iloc[0]
-
-                schedule.append({
-                    'job_id': j,
-                    'forecast_id': t,
-                    'route_key': r,
-                    'allocated_fraction': x_val,
-                    'allocated_bytes': x_val * 3600 * self.throughput[key],
-                    'carbon_emissions': x_val * self.carbon[key],
-                    'completed': pulp.value(self.y[j]) > 0.99
-                })
-
-        return pd.DataFrame(schedule)
+        # Only include non-zero allocations
+        idx = np.flatnonzero(self.x_values > 1e-6)
+        fractions = self.x_values[idx]
+
+        return pd.DataFrame({
+            'job_id': self.job_id_arr[idx],
+            'forecast_id': self.forecast_id_arr[idx],
+            'route_key': self.route_arr[idx],
+            'allocated_fraction': fractions,
+            'allocated_bytes': fractions * self.slot_bytes_arr[idx],
+            'carbon_emissions': fractions * self.carbon_arr[idx],
+            'completed': self.y_values[self.job_idx_arr[idx]] > 0.99
+        }, copy=False)
 
 
 class MilpGreenPlanner:
     def __init__(self, associations_df, job_list):
-        # Keep original for later column access
-        self.associations_df_raw = associations_df.copy()
-
-        # Use MultiIndex for efficient access
-        self.associations_df = associations_df.set_index(['job_id', 'forecast_id', 'route_key'])
-        print(self.associations_df.columns)
-
-        self.route_list = self.associations_df_raw['route_key'].unique()
+        self.route_list = associations_df['route_key'].unique()
         self.job_list = job_list
-        self.time_slots = sorted(self.associations_df_raw['forecast_id'].unique())
+        self.time_slots = sorted(associations_df['forecast_id'].unique())
         self.max_slot = max(self.time_slots)
 
         # Store job deadlines and sizes
@@ -127,110 +168,125 @@ class MilpGreenPlanner:
             for j in job_list
         }
 
-        # Precompute metrics for valid combinations
-        self.valid_combinations = []
-        self.carbon = {}
-        self.throughput = {}
-        self.transfer_time = {}
-
+        # Precompute metrics for valid combinations, stored column-wise in the order of valid_combinations
         print('processing valid combinations...')
-        for j in job_list:
-            job_id = j['id']
-            deadline = self.job_info[job_id]['deadline']
-
-            for t in self.time_slots:
-                if t > deadline:
-                    continue
-
-                for r in self.route_list:
-                    key = (job_id, t, r)
-                    data = self.associations_df.loc[key]
-                    self.valid_combinations.append(key)
-                    self.carbon[key] = float(data['carbon_emissions'])
-                    self.throughput[key] = float(data['throughput']) / 8  # bytes/sec
-                    self.transfer_time[key] = float(data['transfer_time'])
-
+        valid = _valid_combinations(associations_df, job_list, self.route_list, self.max_slot)
+        self.valid_combinations = list(zip(
+            valid['job_id'].tolist(), valid['forecast_id'].tolist(), valid['route_key'].tolist()
+        ))
+
+        self.carbon_arr = valid['carbon_emissions'].to_numpy(dtype=np.float64)
+        self.throughput_arr = valid['throughput'].to_numpy(dtype=np.float64) / 8  # bytes/sec
+        self.slot_bytes_arr = 3600 * self.throughput_arr  # bytes moved by a fully used slot
+        self.transfer_time_arr = valid['transfer_time'].to_numpy(dtype=np.float64)
+        self.source_node_arr = valid['source_node'].to_numpy(dtype=object)
+        self.destination_node_arr = valid['destination_node'].to_numpy(dtype=object)
         print('finished processing valid combinations')
-        # Initialize problem
-        self.problem = pulp.LpProblem("MinCarbon_MaxJobs", pulp.LpMinimize)
 
-        # Variables
-        self.x = pulp.LpVariable.dicts(
-            "x", self.valid_combinations, 0, 1, cat='Continuous'
-        )
-        self.y = pulp.LpVariable.dicts(
-            "y", [j['id'] for j in job_list], cat='Binary'
-        )
+        self.job_pos = {j['id']: i for i, j in enumerate(self.job_list)}
+        self.job_id_arr = valid['job_id'].to_numpy()
+        self.forecast_id_arr = valid['forecast_id'].to_numpy()
+        self.route_arr = valid['route_key'].to_numpy(dtype=object)
+        self.job_idx_arr = valid['job_id'].map(self.job_pos).to_numpy(dtype=np.int64)
+        self.tr_idx_arr = valid.groupby(['forecast_id', 'route_key'], sort=False).ngroup().to_numpy()
 
-    def plan(self):
         # Objective: Minimize carbon emissions (primary), maximize jobs completed (secondary)
+        # Variable layout is [x_0 .. x_{n_x-1}, y_0 .. y_{max_jobs-1}]
         max_jobs = len(self.job_list)
-        max_carbon = max(self.carbon.values()) * max_jobs if self.carbon else 1
+        max_carbon = self.carbon_arr.max() * max_jobs if len(self.carbon_arr) else 1
+        self.cost = np.concatenate([self.carbon_arr / max_carbon, np.full(max_jobs, -1.0 / max_jobs)])
 
-        self.problem += (
-                pulp.lpSum(self.x[key] * self.carbon[key] for key in self.valid_combinations) / max_carbon -
-                pulp.lpSum(self.y[j['id']] for j in self.job_list) / max_jobs
-        )
+        self.h = None
+
+        # Solution vectors, filled in by plan()
+        self.x_values = np.zeros(len(self.valid_combinations))
+        self.y_values = np.zeros(len(self.job_list))
+
+    def plan(self):
+        # The HiGHS model is passed in one passModel call from the CSR constraint matrix
+        self._build_model()
 
-        # Constraints
-        for j in self.job_list:
-            job_id = j['id']
-            bytes_needed = self.job_info[job_id]['bytes']
-
-            # Job must be fully allocated if completed (y[j] = 1)
-            self.problem += (
-                    pulp.lpSum(
-                        3600 * self.throughput[key] * self.x[key]
-                        for key in self.valid_combinations if key[0] == job_id
-                    ) >= bytes_needed * self.y[job_id]
-            )
-
-            # Cannot allocate to a job if not completed
-            for key in self.valid_combinations:
-                if key[0] == job_id:
-                    self.problem += self.x[key] <= self.y[job_id]
-
-        # Time slot capacity (1 hour = 3600 seconds)
-        for t in self.time_slots:
-            for r in self.route_list:
-                self.problem += (
-                        pulp.lpSum(
-                            self.x[key] * self.transfer_time[key]
-                            for key in self.valid_combinations
-                            if key[1] == t and key[2] == r
-                        ) <= 3600
-                )
-
-        # Solve
-        self.problem.solve(pulp.PULP_CBC_CMD(msg=True, timeLimit=5000, threads=4, cuts=True))
-        status = pulp.LpStatus[self.problem.status]
-
-        print(f"\nSolver status: {status}")
-        print(f"Jobs completed: {sum(pulp.value(self.y[j['id']]) for j in self.job_list)}/{len(self.job_list)}")
+        self.h.run()
+        n_x = len(self.valid_combinations)
+        col_value = np.asarray(self.h.getSolution().col_value)
+        if len(col_value):
+            self.x_values = col_value[:n_x]
+            self.y_values = col_value[n_x:]
+
+        print(f"\nSolver status: {self.h.modelStatusToString(self.h.getModelStatus())}")
+        print(f"Jobs completed: {self.y_values.sum()}/{len(self.job_list)}")
 
         return self._generate_schedule()
 
+    def _build_model(self):
+        n_x = len(self.valid_combinations)
+        max_jobs = len(self.job_list)
+        a, row_lower, row_upper = self._build_constraints()
+
+        lp = highspy.HighsLp()
+        lp.num_col_ = n_x + max_jobs
+        lp.num_row_ = a.shape[0]
+        lp.col_cost_ = self.cost
+        lp.col_lower_ = np.zeros(n_x + max_jobs)
+        lp.col_upper_ = np.ones(n_x + max_jobs)
+        lp.row_lower_ = row_lower
+        lp.row_upper_ = row_upper
+        lp.integrality_ = [highspy.HighsVarType.kContinuous] * n_x + [highspy.HighsVarType.kInteger] * max_jobs
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = a.indptr
+        lp.a_matrix_.index_ = a.indices
+        lp.a_matrix_.value_ = a.data
+
+        self.h = highspy.Highs()
+        self.h.setOptionValue('time_limit', 5000.0)
+        self.h.passModel(lp)
+
+    def _build_constraints(self):
+        """Build the constraint rows as one CSR matrix over the [x, y] variable layout, with row bounds"""
+        n_x = len(self.valid_combinations)
+        n_jobs = len(self.job_list)
+        x_ids = np.arange(n_x)
+        job_idx = self.job_idx_arr
+        bytes_needed = np.array([self.job_info[j['id']]['bytes'] for j in self.job_list], dtype=np.float64)
+        coverage, capacity, scale = _coverage_capacity_matrices(
+            job_idx, n_jobs, self.tr_idx_arr, self.slot_bytes_arr, self.transfer_time_arr, bytes_needed
+        )
+
+        # Job must be fully allocated if completed (y[j] = 1)
+        completion = sparse.hstack([coverage, -sparse.diags(bytes_needed / scale)])
+
+        # Cannot allocate to a job if not completed
+        linking = sparse.hstack([
+            sparse.identity(n_x),
+            -sparse.csr_matrix((np.ones(n_x), (x_ids, job_idx)), shape=(n_x, n_jobs))
+        ])
+
+        # Time slot capacity (1 hour = 3600 seconds), one row per (slot, route) pair in use
+        n_tr = capacity.shape[0]
+        capacity = sparse.hstack([capacity, sparse.csr_matrix((n_tr, n_jobs))])
+
+        a = sparse.vstack([completion, linking, capacity], format='csr')
+        row_lower = np.concatenate([np.zeros(n_jobs), np.full(n_x + n_tr, -highspy.kHighsInf)])
+        row_upper = np.concatenate([np.full(n_jobs + n_x, highspy.kHighsInf), np.full(n_tr, 3600.0)])
+        row_upper[n_jobs:n_jobs + n_x] = 0
+        return a, row_lower, row_upper
+
     def _generate_schedule(self):
-        schedule = []
-        for key in self.valid_combinations:
-            j, t, r = key
-            x_val = pulp.value(self.x[key])
-            if x_val > 1e-6:  # Only include non-zero allocations
-                data = self.associations_df.loc[(j, t, r)]
-
-                schedule.append({
-                    'job_id': j,
-                    'forecast_id': t,
-                    'route': r,
-                    'source_node': data['source_node'],
-                    'destination_node': data['destination_node'],
-                    'allocated_fraction': x_val,
-                    'allocated_time': x_val * 3600,
-                    'allocated_bytes': x_val * 3600 * (float(data['throughput']) / 8),
-                    'carbon_emissions': x_val * float(data['carbon_emissions']),
-                    'throughput': float(data['throughput']),
-                    'transfer_time': float(data['transfer_time']),
-                    'completed': pulp.value(self.y[j]) > 0.99
-                })
-
-        return pd.DataFrame(schedule)
+        # Only include non-zero allocations
+        idx = np.flatnonzero(self.x_values > 1e-6)
+        fractions = self.x_values[idx]
+
+        return pd.DataFrame({
+            'job_id': self.job_id_arr[idx],
+            'forecast_id': self.forecast_id_arr[idx],
+            'route': self.route_arr[idx],
+            'source_node': self.source_node_arr[idx],
+            'destination_node': self.destination_node_arr[idx],
+            'allocated_fraction': fractions,
+            'allocated_time': fractions * 3600,
+            'allocated_bytes': fractions * self.slot_bytes_arr[idx],
+            'carbon_emissions': fractions * self.carbon_arr[idx],
+            'throughput': self.throughput_arr[idx] * 8,
+            'transfer_time': self.transfer_time_arr[idx],
+            'completed': self.y_values[self.job_idx_arr[idx]] > 0.99
+        }, copy=False)
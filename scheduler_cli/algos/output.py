@@ -1,36 +1,50 @@
-import json
 import os
 from collections import defaultdict
 
-from rich.console import Console
-from rich.box import ROUNDED
-from rich.panel import Panel
-from rich.table import Table
+import numpy as np
+import pandas as pd
 
 
 class OutputFormatter:
-    def __init__(self, job_list, node_list, time_slots, associations_df, output_dir='/workspace/schedules'):
+    def __init__(self, job_list, node_list, time_slots, associations_df, output_dir='/workspace/schedules',
+                 job_requirements=None):
         self.job_list = job_list
         self.node_list = node_list
+        # Node identifiers normalized once, node_list may hold dicts or plain names
+        self.node_names = [n['name'] if isinstance(n, dict) else n for n in node_list]
         self.time_slots = time_slots
         self.slot_capacity = 3600
         self.output_dir = output_dir
         self.associations_df = associations_df
-        self.console = Console()
-
-        # Calculate job requirements (total bytes needed for each job)
-        self.job_requirements = {
-            j['id']: j['bytes']  # Using the 'size' field from job_list as total bytes needed
-            for j in job_list
-        }
+        self._console = None
+
+        # Calculate job requirements (total bytes needed for each job), a precomputed dict can be shared across formatters
+        if job_requirements is None:
+            job_requirements = {
+                j['id']: j['bytes']  # Using the 'size' field from job_list as total bytes needed
+                for j in job_list
+            }
+        self.job_requirements = job_requirements
+        # Skip jobs with no requirements, built once and reused by every calculate_metrics call
+        required = pd.Series(self.job_requirements, dtype=np.float64)
+        self._required_bytes = required[required > 0]
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def save_to_csv(self, schedule_df, filename):
+    @property
+    def console(self):
+        # rich is only imported once something is actually printed
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    def save_to_csv(self, schedule_df, filename, quiet=False):
         filepath = os.path.join(self.output_dir, filename)
         parent_dir = os.path.dirname(filepath)
         os.makedirs(parent_dir,exist_ok=True)
         schedule_df.to_csv(filepath, index=False)
-        self.console.print(f"\n[bold green]Schedule saved to: [underline]{filepath}[/underline][/bold green]")
+        if not quiet:
+            self.console.print(f"\n[bold green]Schedule saved to: [underline]{filepath}[/underline][/bold green]")
         return filepath
 
     def _get_completion_style(self, percentage):
@@ -58,46 +72,60 @@ class OutputFormatter:
             'partially_scheduled_jobs': []
         }
 
-        scheduled_bytes = defaultdict(float)
-        for _, row in schedule_df.iterrows():
-            # Calculate bytes transferred in this allocation: throughput * allocated_time
-            bytes_transferred = row['throughput'] * row['allocated_time']
-            scheduled_bytes[row['job_id']] += bytes_transferred
-
-            metrics['node_utilization'][row['node']]['total_time'] += row['allocated_time']
-            metrics['node_utilization'][row['node']]['total_carbon'] += row['carbon_emissions']
-            metrics['node_utilization'][row['node']]['total_bytes'] += bytes_transferred
-
-        for job in self.job_list:
-            job_id = job['id']
-            job_bytes = scheduled_bytes.get(job_id, 0)
-            required_bytes = self.job_requirements.get(job_id, 0)
-
-            # Skip jobs with no requirements
-            if required_bytes <= 0:
-                continue
-
-            completion_pct = (job_bytes / required_bytes) * 100 if required_bytes > 0 else 0
-
-            if job_bytes == 0:
-                metrics['unscheduled_jobs'].append(job_id)
-            elif completion_pct < 99.99:  # Account for floating point precision
-                metrics['partially_scheduled_jobs'].append({
-                    'job_id': job_id,
-                    'scheduled_bytes': job_bytes,
-                    'required_bytes': required_bytes,
-                    'completion_percentage': completion_pct
-                })
-
-            if job_bytes > 0:
-                job_df = schedule_df[schedule_df['job_id'] == job_id]
-                metrics['job_metrics'][job_id] = {
-                    'total_bytes': job_bytes,
-                    'total_time': job_df['allocated_time'].sum(),
-                    'total_carbon': job_df['carbon_emissions'].sum(),
-                    'nodes_used': job_df['node'].nunique(),
-                    'completion_percentage': completion_pct
-                }
+        required = self._required_bytes
+        if schedule_df.empty:
+            # Nothing allocated (possibly not even columns), every job with requirements is unscheduled
+            metrics['unscheduled_jobs'] = required.index.tolist()
+            return metrics
+
+        # Bytes transferred in each allocation: throughput * allocated_time
+        schedule_df = schedule_df.assign(bytes_transferred=schedule_df['throughput'] * schedule_df['allocated_time'])
+
+        # Per-node totals as scatter-adds over integer node ids, turned into dicts only at the end
+        node_idx, node_names = pd.factorize(schedule_df['node'])
+        has_node = node_idx >= 0
+        node_totals = [
+            np.bincount(
+                node_idx[has_node], weights=schedule_df[col].to_numpy(dtype=np.float64)[has_node],
+                minlength=len(node_names)
+            ).tolist()
+            for col in ('allocated_time', 'carbon_emissions', 'bytes_transferred')
+        ]
+        metrics['node_utilization'].update(
+            (node, {'total_time': time, 'total_carbon': carbon, 'total_bytes': bytes_})
+            for node, time, carbon, bytes_ in zip(node_names, *node_totals)
+        )
+
+        job_agg = schedule_df.groupby('job_id', sort=False).agg(
+            total_bytes=('bytes_transferred', 'sum'),
+            total_time=('allocated_time', 'sum'),
+            total_carbon=('carbon_emissions', 'sum'),
+            nodes_used=('node', 'nunique')
+        )
+
+        # Jobs with no allocations come back as NaN rows, nodes_used is restored to an int count
+        job_agg = job_agg.reindex(required.index)
+        job_agg['nodes_used'] = job_agg['nodes_used'].fillna(0).astype(np.int64)
+        job_bytes = job_agg['total_bytes'].fillna(0)
+        completion_pct = job_bytes / required * 100
+
+        metrics['unscheduled_jobs'] = required.index[job_bytes == 0].tolist()
+
+        partial = (job_bytes != 0) & (completion_pct < 99.99)  # Account for floating point precision
+        metrics['partially_scheduled_jobs'] = [
+            {
+                'job_id': job_id,
+                'scheduled_bytes': scheduled,
+                'required_bytes': req,
+                'completion_percentage': pct
+            }
+            for job_id, scheduled, req, pct in zip(
+                required.index[partial], job_bytes[partial], required[partial], completion_pct[partial]
+            )
+        ]
+
+        scheduled = job_agg[job_bytes > 0].assign(completion_percentage=completion_pct[job_bytes > 0])
+        metrics['job_metrics'].update(scheduled.to_dict('index'))
 
         return metrics
 
@@ -121,6 +149,10 @@ class OutputFormatter:
         }
 
     def print_summary(self, summary_stats, metrics):
+        from rich.box import ROUNDED
+        from rich.panel import Panel
+        from rich.table import Table
+
         # Header Panel
         title = f"SCHEDULING RESULTS ({summary_stats['optimization_mode'].upper()})"
         self.console.print(Panel.fit(title, style="bold blue", padding=(1, 4)))
@@ -195,21 +227,25 @@ class OutputFormatter:
         node_table.add_column("Carbon %", justify="right")
         node_table.add_column("Data (GB)", justify="right")
 
-        for node in self.node_list:
-            node_name = node['name']
-            stats = metrics['node_utilization'].get(node_name, {'total_time': 0, 'total_carbon': 0, 'total_bytes': 0})
-            time_pct = (stats['total_time'] / summary_stats['total_time']) * 100 if summary_stats[
-                                                                                        'total_time'] > 0 else 0
-            carbon_pct = (stats['total_carbon'] / summary_stats['total_carbon']) * 100 if summary_stats[
-                                                                                              'total_carbon'] > 0 else 0
+        # Percentages for all nodes at once, nodes without allocations show as zero
+        node_df = pd.DataFrame.from_dict(dict(metrics['node_utilization']), orient='index').reindex(
+            self.node_names, columns=['total_time', 'total_carbon', 'total_bytes'], fill_value=0
+        )
+        totals = np.array([summary_stats['total_time'], summary_stats['total_carbon']], dtype=np.float64)
+        pcts = np.divide(
+            node_df[['total_time', 'total_carbon']].to_numpy(dtype=np.float64) * 100, totals,
+            out=np.zeros((len(node_df), 2)), where=totals > 0
+        )
+        node_df = node_df.assign(time_pct=pcts[:, 0], carbon_pct=pcts[:, 1])
 
+        for node_name, total_time, total_carbon, total_bytes, time_pct, carbon_pct in node_df.itertuples(name=None):
             node_table.add_row(
                 node_name,
-                f"{stats['total_time']:.1f}s",
+                f"{total_time:.1f}s",
                 f"{time_pct:.1f}%",
-                f"{stats['total_carbon']:.2f}g",
+                f"{total_carbon:.2f}g",
                 f"{carbon_pct:.1f}%",
-                f"{stats['total_bytes'] / 1e9:.2f}"
+                f"{total_bytes / 1e9:.2f}"
             )
         self.console.print(node_table)
 
@@ -220,6 +256,9 @@ class OutputFormatter:
 
     def compare_algorithms(self, algorithm_results):
         """Compare multiple algorithm results in a single table"""
+        from rich.box import ROUNDED
+        from rich.table import Table
+
         comp_table = Table(title="Algorithm Comparison", box=ROUNDED, style="blue")
 
         # Columns
@@ -258,19 +297,21 @@ class OutputFormatter:
 
         self.console.print(comp_table)
 
-    def format_output(self, schedule_df, filename=None, optimization_mode=None, algorithm_results=None):
+    def format_output(self, schedule_df, filename=None, optimization_mode=None, algorithm_results=None, quiet=False):
         metrics = self.calculate_metrics(schedule_df)
         summary_stats = self.generate_summary_stats(metrics, optimization_mode)
 
         if filename:
-            csv_path = self.save_to_csv(schedule_df, filename)
+            csv_path = self.save_to_csv(schedule_df, filename, quiet=quiet)
         else:
             csv_path = None
 
-        self.print_summary(summary_stats, metrics)
+        # quiet skips all terminal rendering, e.g. for batch sweeps
+        if not quiet:
+            self.print_summary(summary_stats, metrics)
 
-        if algorithm_results:
-            self.compare_algorithms(algorithm_results)
+            if algorithm_results:
+                self.compare_algorithms(algorithm_results)
 
         return {
             'schedule': schedule_df,
@@ -1,6 +1,36 @@
 from typing import List, Dict
 import click
+import numpy as np
 import pandas as pd
+from numba import njit
+
+
+@njit(cache=True)
+def _alloc_slots(capacity, slot_ids, deadline_slot, needed_seconds):
+    """Spread needed_seconds over the earliest slots with free capacity up to deadline_slot,
+    returns (slot indices, seconds per slot), both empty if the job does not fit"""
+    slot_indices = np.empty(len(slot_ids), dtype=np.int64)
+    allocs = np.empty(len(slot_ids), dtype=np.float64)
+    n = 0
+    allocated = 0.0
+
+    for s in range(len(slot_ids)):
+        if slot_ids[s] > deadline_slot:
+            break
+
+        alloc_seconds = min(capacity[s], needed_seconds - allocated)
+        if alloc_seconds > 0:
+            slot_indices[n] = s
+            allocs[n] = alloc_seconds
+            n += 1
+            allocated += alloc_seconds
+
+        if allocated >= needed_seconds:
+            break
+
+    if allocated < needed_seconds:
+        n = 0
+    return slot_indices[:n], allocs[:n]
 
 
 class RoundRobin:
@@ -9,35 +39,49 @@ class RoundRobin:
         self.job_list = job_list
         self.routes = associations_df['route_key'].unique()
         self.time_slots = sorted([int(x) for x in associations_df['forecast_id'].unique()])
+        self.max_slot = max(self.time_slots)
 
-        # Initialize capacity in seconds (3600 per slot)
-        self.capacity = {
-            route_key: {slot: 3600.0 for slot in self.time_slots}
-            for route_key in self.routes
-        }
+        self.slot_arr = np.asarray(self.time_slots, dtype=np.int64)
+
+        # Initialize capacity in seconds (3600 per slot), one row per route and one column per slot
+        self.route_idx = {route_key: i for i, route_key in enumerate(self.routes)}
+        self.capacity = np.full((len(self.routes), len(self.time_slots)), 3600.0)
 
         # Precompute job metrics
         self.job_metrics = self._precompute_job_metrics()
         self.job_deadlines = {job['id']: job.get('deadline') for job in job_list}
+        # Deadlines as an array so plan() orders jobs with one argsort, missing deadlines sort last
+        self.deadline_arr = np.array(
+            [float('inf') if job.get('deadline') is None else int(job['deadline']) for job in job_list], dtype=np.float64
+        )
 
         # Round-robin state
         self.next_node_idx = 0
 
     def _precompute_job_metrics(self):
-        """Precompute metrics for each job-route pair"""
-        metrics = {}
-        for (job_id, route_key), group in self.df.groupby(['job_id', 'route_key']):
-            if job_id not in metrics:
-                metrics[job_id] = {}
-            first_row = group.iloc[0]
-            metrics[job_id][route_key] = {
-                'source_node': first_row['source_node'],
-                'destination_node': first_row['destination_node'],
-                'carbon': float(first_row['carbon_emissions']),
-                'throughput': float(first_row['throughput']),
-                'transfer_time': float(first_row['transfer_time_hours']) * 3600,  # in seconds
-                'transfer_time_hours': float(first_row['transfer_time_hours']),
-            }
+        """Precompute metrics for each job-route pair as (jobs, routes) arrays indexed by job code and
+        route_idx; duplicate pairs keep their first row"""
+        first_rows = self.df.drop_duplicates(['job_id', 'route_key'])
+        job_codes, job_keys = pd.factorize(first_rows['job_id'])
+        route_codes = first_rows['route_key'].map(self.route_idx).to_numpy()
+        self.job_code = {job_id: i for i, job_id in enumerate(job_keys)}
+
+        shape = (len(job_keys), len(self.routes))
+        metrics = {
+            'present': np.zeros(shape, dtype=bool),
+            'carbon': np.zeros(shape),
+            'throughput': np.zeros(shape),
+            'transfer_time': np.zeros(shape)  # in seconds
+        }
+        metrics['present'][job_codes, route_codes] = True
+        metrics['carbon'][job_codes, route_codes] = first_rows['carbon_emissions'].to_numpy(dtype=np.float64)
+        metrics['throughput'][job_codes, route_codes] = first_rows['throughput'].to_numpy(dtype=np.float64)
+        metrics['transfer_time'][job_codes, route_codes] = first_rows['transfer_time_hours'].to_numpy(dtype=np.float64) * 3600
+
+        # Endpoints only depend on the route
+        route_rows = self.df.drop_duplicates(['route_key'])
+        metrics['source_node'] = route_rows['source_node'].tolist()
+        metrics['destination_node'] = route_rows['destination_node'].tolist()
         return metrics
 
     def _get_next_route_key(self):
@@ -46,87 +90,79 @@ class RoundRobin:
         self.next_node_idx += 1
         return route_key
 
-    def _get_job_metrics(self, job_id, route_key):
-        """Get metrics for a specific job-route pair"""
-        return self.job_metrics.get(job_id, {}).get(route_key)
+    def _get_job_metrics(self, job_code, route_code):
+        """Get (carbon, throughput, transfer_time) for a job-route pair, None if the pair has no data"""
+        if job_code is None or not self.job_metrics['present'][job_code, route_code]:
+            return None
+        return (
+            float(self.job_metrics['carbon'][job_code, route_code]),
+            float(self.job_metrics['throughput'][job_code, route_code]),
+            float(self.job_metrics['transfer_time'][job_code, route_code])
+        )
 
-    def _find_available_slots(self, job_id, route_key, deadline):
-        """Find available slots for a job considering deadline"""
-        metrics = self._get_job_metrics(job_id, route_key)
-        if not metrics or metrics['transfer_time'] <= 0:
-            return []
+    def _find_available_slots(self, job_code, route_code, deadline):
+        """Find available slots for a job considering deadline, returns (slot indices, seconds per slot)
+        or None if the job has no data on this route"""
+        metrics = self._get_job_metrics(job_code, route_code)
+        needed_seconds = metrics[2] if metrics else 0.0  # transfer_time
+        if needed_seconds <= 0:
+            return None
 
         try:
             deadline = int(deadline) if deadline is not None else None
         except (ValueError, TypeError):
             deadline = None
 
-        max_slot = max(self.time_slots)
-        deadline_slot = min(deadline, max_slot) if deadline is not None else max_slot
-
-        needed_seconds = metrics['transfer_time']
-        allocated = 0.0
-        slot_allocations = []
+        deadline_slot = min(deadline, self.max_slot) if deadline is not None else self.max_slot
 
-        for slot_idx, slot_time in enumerate(self.time_slots):
-            if slot_time > deadline_slot:
-                break
-
-            available = self.capacity[route_key][slot_time]
-            alloc_seconds = min(available, needed_seconds - allocated)
-            if alloc_seconds > 0:
-                alloc_fraction = alloc_seconds / metrics['transfer_time']
-                slot_allocations.append((slot_idx, alloc_fraction, alloc_seconds))
-                allocated += alloc_seconds
-
-            if allocated >= needed_seconds:
-                break
-
-        return slot_allocations if allocated >= needed_seconds else []
+        return _alloc_slots(self.capacity[route_code], self.slot_arr, deadline_slot, needed_seconds)
 
     def plan(self):
         """Generate round-robin schedule matching MILP output format"""
-        schedule = []
+        # Output columns preallocated for the worst case (every job in every slot) and filled by a write cursor
+        max_rows = len(self.job_list) * len(self.time_slots)
+        job_pos = np.empty(max_rows, dtype=np.int64)
+        route_codes = np.empty(max_rows, dtype=np.int64)
+        slot_pos = np.empty(max_rows, dtype=np.int64)
+        allocated_fraction = np.empty(max_rows)
+        allocated_time = np.empty(max_rows)
+        carbon_emissions = np.empty(max_rows)
+        throughput = np.empty(max_rows)
+        transfer_time = np.empty(max_rows)
+        n = 0
 
         # Sort jobs by deadline (earliest first)
-        jobs_sorted = sorted(
-            self.job_list,
-            key=lambda x: (float('inf') if x.get('deadline') is None else int(x['deadline']))
-        )
-
-        for job in jobs_sorted:
+        for i in np.argsort(self.deadline_arr, kind='stable').tolist():
+            job = self.job_list[i]
             job_id = job['id']
             deadline = job.get('deadline')
+            job_code = self.job_code.get(job_id)
             scheduled = False
 
             # Try all routes in round-robin order
             for _ in range(len(self.routes)):
                 route_key = self._get_next_route_key()
-                slot_allocations = self._find_available_slots(job_id, route_key, deadline)
+                route_code = self.route_idx[route_key]
+                slot_allocations = self._find_available_slots(job_code, route_code, deadline)
 
-                if not slot_allocations:
+                if slot_allocations is None or not len(slot_allocations[0]):
                     continue
 
-                metrics = self._get_job_metrics(job_id, route_key)
+                slot_indices, allocs = slot_allocations
+                carbon, route_throughput, needed_seconds = self._get_job_metrics(job_code, route_code)
 
                 # Allocate time to each slot
-                for slot_idx, alloc_fraction, alloc_seconds in slot_allocations:
-                    slot_time = self.time_slots[slot_idx]
-                    self.capacity[route_key][slot_time] -= alloc_seconds
-
-                    schedule.append({
-                        'job_id': job_id,
-                        'route': route_key,
-                        'source_node': metrics['source_node'],
-                        'destination_node': metrics['destination_node'],
-                        'forecast_id': slot_time,
-                        'allocated_fraction': alloc_fraction,
-                        'allocated_time': alloc_seconds,
-                        'carbon_emissions': metrics['carbon'],
-                        'throughput': metrics['throughput'],
-                        'transfer_time': metrics['transfer_time'],
-                        'deadline': self.job_deadlines[job_id]
-                    })
+                self.capacity[route_code, slot_indices] -= allocs
+                rows = slice(n, n + len(slot_indices))
+                job_pos[rows] = i
+                route_codes[rows] = route_code
+                slot_pos[rows] = slot_indices
+                allocated_fraction[rows] = allocs / needed_seconds
+                allocated_time[rows] = allocs
+                carbon_emissions[rows] = carbon
+                throughput[rows] = route_throughput
+                transfer_time[rows] = needed_seconds
+                n += len(slot_indices)
 
                 scheduled = True
                 break
@@ -134,4 +170,17 @@ class RoundRobin:
             if not scheduled:
                 click.secho(f"⚠️ Failed to schedule Job {job_id} (deadline: {deadline})", fg='yellow')
 
-        return pd.DataFrame(schedule)
\ No newline at end of file
+        job_pos, route_codes = job_pos[:n], route_codes[:n]
+        return pd.DataFrame({
+            'job_id': pd.Index([job['id'] for job in self.job_list]).take(job_pos),
+            'route': pd.Index(self.routes).take(route_codes),
+            'source_node': pd.Index(self.job_metrics['source_node']).take(route_codes),
+            'destination_node': pd.Index(self.job_metrics['destination_node']).take(route_codes),
+            'forecast_id': self.slot_arr[slot_pos[:n]],
+            'allocated_fraction': allocated_fraction[:n],
+            'allocated_time': allocated_time[:n],
+            'carbon_emissions': carbon_emissions[:n],
+            'throughput': throughput[:n],
+            'transfer_time': transfer_time[:n],
+            'deadline': pd.Index([self.job_deadlines[job['id']] for job in self.job_list]).take(job_pos)
+        })
\ No newline at end of file
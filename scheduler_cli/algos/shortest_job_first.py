@@ -1,8 +1,27 @@
 from collections import defaultdict
 from typing import List, Dict
 import click
+import numpy as np
 import pandas as pd
-import math
+from numba import njit
+
+from algos.job_routes import first_pair_rows
+
+
+@njit(cache=True)
+def _first_window(capacity, rows, slots_needed, time_per_slot, n_slots):
+    """Scan routes in order for the earliest run of slots_needed consecutive slots in the first n_slots that each
+    have time_per_slot free, returns (route position, start slot index) or (-1, -1) if no route fits"""
+    for r in range(len(rows)):
+        run = 0
+        for s in range(n_slots):
+            if capacity[rows[r], s] >= time_per_slot[r]:
+                run += 1
+                if run == slots_needed[r]:
+                    return r, s - run + 1
+            else:
+                run = 0
+    return -1, -1
 
 
 class ShortestJobFirst:
@@ -12,45 +31,74 @@ class ShortestJobFirst:
 
         # Get unique time slots from forecast_id
         self.time_slots = sorted([int(x) for x in associations_df['forecast_id'].unique()])
+        self.max_slot = max(self.time_slots)
+        self.slot_arr = np.asarray(self.time_slots, dtype=np.int64)
 
-        # Capacity in seconds (3600 per slot) per route
-        self.capacity = {
-            row['route_key']: {slot: 3600.0 for slot in self.time_slots}
-            for _, row in associations_df.drop_duplicates(['route_key']).iterrows()
-        }
+        # Capacity in seconds (3600 per slot), one row per route and one column per slot
+        self.route_idx = {route_key: i for i, route_key in enumerate(associations_df['route_key'].unique())}
+        self.capacity = np.full((len(self.route_idx), len(self.time_slots)), 3600.0)
 
         # Precompute job metrics
         self.job_metrics = self._precompute_job_metrics()
         self.job_deadlines = {job['id']: job.get('deadline') for job in job_list}
 
+        # Per-job routes ordered by transfer time (fastest first) and the fastest time, used as the SJF sort key.
+        # job_metrics already holds each job's routes in that order.
+        self.routes_by_transfer_time = {job_id: list(routes) for job_id, routes in self.job_metrics.items()}
+        self.min_transfer_time = {
+            job_id: self.job_metrics[job_id][route_keys[0]][4]
+            for job_id, route_keys in self.routes_by_transfer_time.items()
+        }
+
+        # Sort keys as arrays so plan() orders jobs with one lexsort, missing values sort last
+        self.deadline_arr = np.array(
+            [float('inf') if job.get('deadline') is None else int(job['deadline']) for job in job_list], dtype=np.float64
+        )
+        self.min_transfer_time_arr = np.array(
+            [self.min_transfer_time.get(job['id'], float('inf')) for job in job_list], dtype=np.float64
+        )
+
+        # Candidate routes per job as arrays for the batched window search, with each route's window length and
+        # per-slot time fixed up front. Zero-time routes are never scheduled.
+        self.route_options = {}
+        for job_id, route_keys in self.routes_by_transfer_time.items():
+            route_keys = [r for r in route_keys if self.job_metrics[job_id][r][4] > 0]
+            transfer_times = np.array([self.job_metrics[job_id][r][4] for r in route_keys], dtype=np.float64)
+            slots_needed = (-(-transfer_times // 3600)).astype(np.int64)  # Round up to full slots
+            self.route_options[job_id] = (
+                route_keys,
+                np.array([self.route_idx[r] for r in route_keys], dtype=np.int64),
+                slots_needed,
+                transfer_times / slots_needed
+            )
+
     def _precompute_job_metrics(self):
-        """Precompute metrics for each job-route pair"""
+        """Precompute metrics for each job-route pair from the first row of each (job_id, route_key) pair, stored as
+        (source_node, destination_node, carbon_emissions, throughput, transfer_time in seconds) tuples. Each job's
+        routes are inserted fastest first, so callers never re-sort them."""
+        first_idx, first_job_codes = first_pair_rows(self.df)
+        # Fastest route first within each job, lexsort is stable so equal times keep route order
+        seconds = self.df['transfer_time_hours'].to_numpy(dtype=np.float64)[first_idx] * 3600
+        first_idx = first_idx[np.lexsort((seconds, first_job_codes))]
+        columns = ['job_id', 'route_key', 'source_node', 'destination_node', 'carbon_emissions', 'throughput',
+                   'transfer_time_hours']
+
         metrics = defaultdict(dict)
-        for (job_id, route_key), group in self.df.groupby(['job_id', 'route_key']):
-            first_row = group.iloc[0]
-            total_transfer_time = float(first_row['transfer_time_hours']) * 3600  # in seconds
-            metrics[job_id][route_key] = {
-                'source_node': first_row['source_node'],
-                'destination_node': first_row['destination_node'],
-                'carbon_emissions': float(first_row['carbon_emissions']),
-                'throughput': float(first_row['throughput']),
-                'transfer_time': total_transfer_time,
-                'transfer_time_hours': float(first_row['transfer_time_hours'])
-            }
+        for job_id, route_key, source, destination, carbon, throughput, hours in self.df.iloc[first_idx][
+                columns].itertuples(index=False, name=None):
+            metrics[job_id][route_key] = (source, destination, float(carbon), float(throughput), float(hours) * 3600)
         return metrics
 
     def _get_job_metrics(self, job_id, route_key):
         """Get metrics for a specific job-route pair"""
         return self.job_metrics.get(job_id, {}).get(route_key)
 
-    def _find_available_slots(self, job_id, route_key, deadline):
-        """Find consecutive slots that can accommodate the job before deadline"""
-        metrics = self._get_job_metrics(job_id, route_key)
-        if not metrics or metrics['transfer_time'] <= 0:
-            return []
-
-        total_transfer_time = metrics['transfer_time']
-        slots_needed = math.ceil(total_transfer_time / 3600)  # Round up to full slots
+    def _find_available_slots(self, job_id, deadline):
+        """Find the fastest route with consecutive slots that can accommodate the job before deadline,
+        returns (route_key, slot indices) or (None, [])"""
+        route_keys, rows, slots_needed, time_per_slot = self.route_options.get(job_id, ([], None, None, None))
+        if not route_keys:
+            return None, []
 
         # Handle deadline
         try:
@@ -58,48 +106,37 @@ class ShortestJobFirst:
         except (ValueError, TypeError):
             deadline = None
 
-        max_slot = max(self.time_slots)
-        deadline_slot = min(deadline, max_slot) if deadline is not None else max_slot
-
-        # Find earliest possible slots that meet deadline
-        for start_slot_idx in range(len(self.time_slots) - slots_needed + 1):
-            end_slot_idx = start_slot_idx + slots_needed - 1
-            if self.time_slots[end_slot_idx] > deadline_slot:
-                continue  # Doesn't meet deadline
-
-            # Check capacity in all required slots
-            time_per_slot = total_transfer_time / slots_needed
-            can_allocate = all(
-                self.capacity[route_key][self.time_slots[slot_idx]] >= time_per_slot
-                for slot_idx in range(start_slot_idx, end_slot_idx + 1)
-            )
-
-            if can_allocate:
-                return list(range(start_slot_idx, end_slot_idx + 1))
+        deadline_slot = min(deadline, self.max_slot) if deadline is not None else self.max_slot
 
-        return []
+        # Only slots up to the deadline are scanned, so a window that would run past the deadline (or past
+        # the last slot) never fits. Routes are in fastest-first order, so the first route with a fit wins.
+        n_slots = int(np.searchsorted(self.slot_arr, deadline_slot, side='right'))
+        r, start_slot_idx = _first_window(self.capacity, rows, slots_needed, time_per_slot, n_slots)
+        if r < 0:
+            return None, []
+        return route_keys[r], list(range(start_slot_idx, start_slot_idx + int(slots_needed[r])))
 
     def _add_schedule_entry(self, job, route_key, slot_indices, metrics, schedule):
         """Add an entry to the schedule and update capacities"""
-        total_transfer_time = metrics['transfer_time']
+        source, destination, carbon, throughput, total_transfer_time = metrics
         time_per_slot = total_transfer_time / len(slot_indices)
         allocated_fraction = time_per_slot / 3600  # Fraction of slot hour used
+        self.capacity[self.route_idx[route_key], slot_indices] -= time_per_slot
 
         for slot_idx in slot_indices:
             slot_time = self.time_slots[slot_idx]
-            self.capacity[route_key][slot_time] -= time_per_slot
 
             schedule.append({
                 'job_id': job['id'],
                 'route': route_key,
-                'source_node': metrics['source_node'],
-                'destination_node': metrics['destination_node'],
+                'source_node': source,
+                'destination_node': destination,
                 'forecast_id': slot_time,
                 'allocated_fraction': allocated_fraction,
                 'allocated_time': time_per_slot,
-                'carbon_emissions': metrics['carbon_emissions'],  # Full emissions for job
-                'throughput': metrics['throughput'],
-                'transfer_time': metrics['transfer_time'],  # Total job time
+                'carbon_emissions': carbon,  # Full emissions for job
+                'throughput': throughput,
+                'transfer_time': total_transfer_time,  # Total job time
                 'deadline': self.job_deadlines[job['id']],
                 'extendable': job.get('extendable', False)
             })
@@ -109,37 +146,18 @@ class ShortestJobFirst:
         schedule = []
 
         # Sort jobs by: 1) shortest transfer time, 2) earliest deadline
-        jobs_sorted = sorted(
-            self.job_list,
-            key=lambda x: (
-                min(
-                    [m['transfer_time'] for m in self.job_metrics.get(x['id'], {}).values()],
-                    default=float('inf')
-                ),
-                int(x['deadline']) if x.get('deadline') is not None else float('inf')
-            )
-        )
+        jobs_sorted = [self.job_list[i] for i in np.lexsort((self.deadline_arr, self.min_transfer_time_arr))]
 
         for job in jobs_sorted:
             job_id = job['id']
             deadline = job.get('deadline')
-            scheduled = False
-
-            # Get all possible routes for this job, sorted by transfer time (fastest first)
-            route_options = sorted(
-                self.job_metrics.get(job_id, {}).keys(),
-                key=lambda r: self.job_metrics[job_id][r]['transfer_time']
-            )
-
-            for route_key in route_options:
-                slot_indices = self._find_available_slots(job_id, route_key, deadline)
-                if slot_indices:
-                    metrics = self._get_job_metrics(job_id, route_key)
-                    self._add_schedule_entry(job, route_key, slot_indices, metrics, schedule)
-                    scheduled = True
-                    break
 
-            if not scheduled:
+            # Fastest route (by transfer time) that has a window for this job
+            route_key, slot_indices = self._find_available_slots(job_id, deadline)
+            if slot_indices:
+                metrics = self._get_job_metrics(job_id, route_key)
+                self._add_schedule_entry(job, route_key, slot_indices, metrics, schedule)
+            else:
                 click.secho(f"⚠️ Failed to schedule Job {job_id} (deadline: {deadline})", fg='yellow')
 
         return pd.DataFrame(schedule)
\ No newline at end of file
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import click
 
@@ -10,32 +11,42 @@ class WorstCasePlanner:
         self.slot_duration = 3600  # seconds per time slot
         self.nodes = associations_df['node'].unique()
         self.time_slots = sorted([int(x) for x in associations_df['forecast_id'].unique()])
-        self.remaining_capacity = {
-            node: {slot: 3600.0 for slot in self.time_slots}
-            for node in self.nodes
-        }
+        # Remaining seconds per node (rows) and slot (columns)
+        self.node_idx = {node: i for i, node in enumerate(self.nodes)}
+        self.slot_arr = np.asarray(self.time_slots, dtype=np.int64)
+        self.remaining_capacity = np.full((len(self.nodes), len(self.time_slots)), 3600.0)
 
+        # Per-job highest-mean-carbon node, from one groupby instead of filtering the frame per job and per node
+        mean_carbon = associations_df.groupby(['job_id', 'node'])['carbon_emissions'].mean()
+        self.best_nodes = {job_id: node for job_id, node in mean_carbon.groupby(level=0).idxmax()}
+        self.best_slots = self._best_slot_arrays()
+        self.max_emissions = associations_df.groupby('job_id', sort=False)['carbon_emissions'].max().to_dict()
 
     def plan(self):
         """Generate the worst-case carbon emissions schedule with continuous time allocation."""
-        schedule = []
+        # Output columns preallocated for the worst case (every job in every slot) and filled by a write cursor
+        max_rows = len(self.job_list) * len(self.time_slots)
+        schedule = {
+            'job_id': np.empty(max_rows, dtype=object),
+            'node': np.empty(max_rows, dtype=object),
+            'forecast_id': np.empty(max_rows, dtype=np.int64),
+            'transfer_time': np.empty(max_rows),
+            'carbon_emissions': np.empty(max_rows),
+            'throughput': np.empty(max_rows),
+            'is_partial': np.empty(max_rows, dtype=bool)
+        }
+        self.n_rows = 0
         unallocated_jobs = []
 
-        # Sort jobs by carbon intensity potential (highest possible emissions first)
-        sorted_jobs = sorted(self.job_list,
-                             key=lambda x: self._get_max_possible_emissions(x['id']),
-                             reverse=True)
+        # Sort jobs by carbon intensity potential (highest possible emissions first), stable like sorted(reverse=True)
+        max_emissions = np.array([self.max_emissions.get(job['id'], np.nan) for job in self.job_list])
+        sorted_jobs = [self.job_list[i] for i in np.argsort(-max_emissions, kind='stable')]
 
         for job in sorted_jobs:
             job_id = job['id']
-            job_df = self.associations_df[self.associations_df['job_id'] == job_id]
-
-            # Get the node with highest average carbon emissions for this job
-            best_node = job_df.groupby('node')['carbon_emissions'].mean().idxmax()
-            node_df = job_df[job_df['node'] == best_node]
-
-            # Sort slots by carbon emissions (highest first)
-            sorted_slots = node_df.sort_values('carbon_emissions', ascending=False)
+            # Node with highest average carbon emissions for this job, slots sorted highest first
+            best_node = self.best_nodes[job_id]
+            sorted_slots = self.best_slots[job_id]
 
             allocated = self._allocate_job_continuous(
                 job_id,
@@ -53,24 +64,51 @@ class WorstCasePlanner:
             for job_id in unallocated_jobs:
                 click.secho(f"  - Job {job_id}", fg='red')
 
-        return pd.DataFrame(schedule)
+        n = self.n_rows
+        return pd.DataFrame({
+            'job_id': schedule['job_id'][:n].tolist(),
+            'node': schedule['node'][:n].tolist(),
+            'forecast_id': schedule['forecast_id'][:n],
+            'transfer_time': schedule['transfer_time'][:n],
+            'carbon_emissions': schedule['carbon_emissions'][:n],
+            'throughput': schedule['throughput'][:n],
+            'is_partial': schedule['is_partial'][:n]
+        })
 
-    def _get_max_possible_emissions(self, job_id):
-        """Helper to get maximum possible emissions for a job across all options"""
-        job_df = self.associations_df[self.associations_df['job_id'] == job_id]
-        return job_df['carbon_emissions'].max()
+    def _best_slot_arrays(self):
+        """Rows of each job's best node, highest carbon first, as (forecast_id, capacity column, carbon_emissions,
+        throughput, transfer_time) arrays. One lexsort over all best-node rows replaces a sort per job."""
+        df = self.associations_df
+        rows = df[(df['node'] == df['job_id'].map(self.best_nodes)).to_numpy()]
+        job_codes, job_keys = pd.factorize(rows['job_id'])
+        order = np.lexsort((-rows['carbon_emissions'].to_numpy(dtype=np.float64), job_codes))
+        job_codes = job_codes[order]
+
+        slots = rows['forecast_id'].to_numpy()[order]
+        cols = np.searchsorted(self.slot_arr, slots)  # time_slots is sorted, so this is each slot's column
+        carbon = rows['carbon_emissions'].to_numpy()[order]
+        throughput = rows['throughput'].to_numpy()[order]
+        transfer_time = rows['transfer_time'].to_numpy()[order]
+
+        bounds = np.searchsorted(job_codes, np.arange(len(job_keys) + 1))
+        return {
+            job_id: tuple(a[start:end] for a in (slots, cols, carbon, throughput, transfer_time))
+            for job_id, start, end in zip(job_keys, bounds[:-1], bounds[1:])
+        }
 
     def _allocate_job_continuous(self, job_id, node, sorted_slots, schedule):
         """Attempt to allocate job across continuous slots if needed"""
-        job_df = sorted_slots[sorted_slots['job_id'] == job_id]
-        required_time = job_df.iloc[0]['transfer_time']
-
-        # Try to find a single slot with enough capacity
-        for _, slot_row in sorted_slots.iterrows():
-            slot = slot_row['forecast_id']
-            if self.remaining_capacity[node][slot] >= required_time:
-                self._allocate_to_slot(job_id, node, slot, required_time, slot_row, schedule)
-                return True
+        slots, cols, carbon, throughput, transfer_time = sorted_slots
+        required_time = transfer_time[0]
+        capacity = self.remaining_capacity[self.node_idx[node]]
+
+        # Try to find a single slot with enough capacity, checked for all slots at once in carbon order.
+        # Only the first hit is used, so argmax stops there instead of collecting every fitting slot.
+        fits = capacity[cols] >= required_time
+        i = int(fits.argmax())
+        if fits[i]:
+            self._allocate_to_slot(job_id, node, slots[i], cols[i], required_time, carbon[i], throughput[i], schedule)
+            return True
 
         # If no single slot has enough capacity, try consecutive slots
         if required_time > self.slot_duration:
@@ -80,62 +118,48 @@ class WorstCasePlanner:
 
     def _allocate_across_multiple_slots(self, job_id, node, sorted_slots, required_time, schedule):
         """Allocate job across multiple consecutive slots"""
-        # Find the highest-carbon sequence of consecutive slots
-        slots = sorted_slots['forecast_id'].unique()
-
-        # Group slots into consecutive sequences
-        consecutive_sequences = []
-        current_sequence = []
+        slots, cols, carbon, throughput, _ = sorted_slots
 
-        for slot in sorted(slots):
-            if not current_sequence or slot == current_sequence[-1] + 1:
-                current_sequence.append(slot)
-            else:
-                if len(current_sequence) > 0:
-                    consecutive_sequences.append(current_sequence)
-                current_sequence = [slot]
-
-        if current_sequence:
-            consecutive_sequences.append(current_sequence)
+        # Distinct slots in time order, each with its first (highest carbon) row, split into consecutive runs
+        unique_slots, first = np.unique(slots, return_index=True)
+        consecutive_sequences = np.split(np.arange(len(unique_slots)), np.flatnonzero(np.diff(unique_slots) != 1) + 1)
 
         # Try to find a sequence with enough total capacity
+        capacity = self.remaining_capacity[self.node_idx[node]]
         for sequence in consecutive_sequences:
-            total_available = sum(self.remaining_capacity[node][s] for s in sequence)
-            if total_available >= required_time:
-                remaining_to_allocate = required_time
-
-                for slot in sequence:
-                    if remaining_to_allocate <= 0:
-                        break
-
-                    alloc_in_slot = min(remaining_to_allocate, self.remaining_capacity[node][slot])
-                    if alloc_in_slot > 0:
-                        slot_row = sorted_slots[sorted_slots['forecast_id'] == slot].iloc[0]
-                        self._allocate_to_slot(
-                            job_id,
-                            node,
-                            slot,
-                            alloc_in_slot,
-                            slot_row,
-                            schedule,
-                            partial=True
-                        )
-                        remaining_to_allocate -= alloc_in_slot
+            available = capacity[cols[first[sequence]]]
+            if available.sum() >= required_time:
+                # Fill slots in order: each takes what is left after the slots before it, capped by its capacity
+                allocs = np.minimum(available, required_time - (np.cumsum(available) - available))
+                used = allocs > 0
+                for pos, alloc_in_slot in zip(sequence[used].tolist(), allocs[used].tolist()):
+                    row = first[pos]
+                    self._allocate_to_slot(
+                        job_id,
+                        node,
+                        unique_slots[pos],
+                        cols[row],
+                        alloc_in_slot,
+                        carbon[row],
+                        throughput[row],
+                        schedule,
+                        partial=True
+                    )
 
                 return True
 
         return False
 
-    def _allocate_to_slot(self, job_id, node, slot, alloc_time, slot_row, schedule, partial=False):
-        """Allocate job to a specific slot"""
-        self.remaining_capacity[node][slot] -= alloc_time
-
-        schedule.append({
-            'job_id': job_id,
-            'node': node,
-            'forecast_id': slot,
-            'transfer_time': alloc_time,
-            'carbon_emissions': slot_row['carbon_emissions'],
-            'throughput': slot_row['throughput'],
-            'is_partial': partial
-        })
+    def _allocate_to_slot(self, job_id, node, slot, col, alloc_time, carbon, throughput, schedule, partial=False):
+        """Allocate job to a specific slot (capacity column col), written into the next row of the schedule columns"""
+        self.remaining_capacity[self.node_idx[node], col] -= alloc_time
+
+        n = self.n_rows
+        schedule['job_id'][n] = job_id
+        schedule['node'][n] = node
+        schedule['forecast_id'][n] = slot
+        schedule['transfer_time'][n] = alloc_time
+        schedule['carbon_emissions'][n] = carbon
+        schedule['throughput'][n] = throughput
+        schedule['is_partial'][n] = partial
+        self.n_rows = n + 1
@@ -1,24 +1,33 @@
-import concurrent.futures
 import json
 import math
 import multiprocessing
 import os.path
-from functools import partial
 from typing import Dict, List
 
 import click
+import numpy as np
 import pandas as pd
+from numba import njit
 
 from models import get_unique_ips, IpToLonAndLat, process_pmeter_tr
 from simgrid_simulator import SimGridSimulator
 from zone_discovery import HistoricalForecastService
 
 
-def _run_simulation_task(args, simulator):
-    """Standalone function that can be pickled for multiprocessing"""
+# Simulator shared by every task in a worker process, set by _init_worker
+_worker_simulator = None
+
+
+def _init_worker(simulator):
+    global _worker_simulator
+    _worker_simulator = simulator
+
+
+def _run_simulation_task(args):
+    """Standalone function that can be pickled for multiprocessing, runs on the worker's simulator"""
     route_key, job_size, job_id = args
     try:
-        simulator.run_simulation(
+        _worker_simulator.run_simulation(
             node_name=route_key,
             flows=1,
             job_size=job_size,
@@ -30,6 +39,24 @@ def _run_simulation_task(args, simulator):
         return False
 
 
+@njit(cache=True)
+def _path_emissions(ci_table, hop_ip_ids, hourly_energy, hour_weights, forecast_ids):
+    """Emissions for each start in forecast_ids: hourly hop energy times carbon intensity, hours wrapping around
+    the forecast and weighted by the fraction used (the last may be partial); 3.6e6 J per kWh"""
+    forecast_len = ci_table.shape[0]
+    emissions = np.zeros(len(forecast_ids))
+    for f in range(len(forecast_ids)):
+        total = 0.0
+        for h in range(len(hour_weights)):
+            fidx = (forecast_ids[f] + h) % forecast_len
+            hour_total = 0.0
+            for p in range(len(hop_ip_ids)):
+                hour_total += ci_table[fidx, hop_ip_ids[p]] * hourly_energy[p]
+            total += hour_total * hour_weights[h]
+        emissions[f] = total / 3.6e6
+    return emissions
+
+
 class DataGenerator:
 
     def __init__(self, node_file_path, ip_list_file_path, job_file_path, forecast_service: HistoricalForecastService,
@@ -47,6 +74,8 @@ class DataGenerator:
         self.links_ip = {}
         self.forecast_service = forecast_service
         self.forecast_len = forecast_len
+        self.ci_table = None
+        self.ip_ids = {}
 
     def prepare_fields(self):
         with open(self.node_file_path, 'r') as f:
@@ -69,13 +98,28 @@ class DataGenerator:
         self.routers_ip, self.links_ip = self.simulator.create_xml_for_traceroute()
 
     def load_in_forecasts(self):
-        self.forecasts_df = pd.DataFrame()
-        for _, traceroute in self.nodeid_to_map_traceroutes.items():
-            local_df = self.forecast_service.ips_to_forecasts(traceroute)
-            self.forecasts_df = pd.concat([self.forecasts_df, local_df], ignore_index=True)
+        if not self.nodeid_to_map_traceroutes:
+            raise ValueError("No traceroutes loaded, cannot look up carbon intensity forecasts")
+        # One concat over all traceroutes instead of re-copying the growing frame per traceroute
+        self.forecasts_df = pd.concat(
+            [self.forecast_service.ips_to_forecasts(traceroute)
+             for traceroute in self.nodeid_to_map_traceroutes.values()],
+            ignore_index=True
+        )
         self.forecasts_df.drop_duplicates(inplace=True)
         os.makedirs('/workspace/data', exist_ok=True)
         self.forecasts_df.to_csv('/workspace/data/forecast_data.csv')
+        self._build_ci_table()
+
+    def _build_ci_table(self):
+        """Carbon intensity as a (forecast_idx, ip id) array so emission lookups index it instead of filtering
+        forecasts_df. The first row wins for duplicate (forecast_idx, ip) pairs, missing pairs are NaN and rejected at lookup."""
+        first = self.forecasts_df.drop_duplicates(['forecast_idx', 'ip'])
+        first = first[first['forecast_idx'] < self.forecast_len]
+        ip_codes, ips = pd.factorize(first['ip'])
+        self.ip_ids = {ip: i for i, ip in enumerate(ips)}
+        self.ci_table = np.full((self.forecast_len, len(ips)), np.nan)
+        self.ci_table[first['forecast_idx'].to_numpy(dtype=np.int64), ip_codes] = first['ci'].to_numpy(dtype=np.float64)
 
     def generate_energy_data(self, mode='time', max_workers=20):
         # Create tasks for all source-destination routes and jobs
@@ -112,15 +156,13 @@ class DataGenerator:
                 fill_char='=',
                 empty_char=' '
         ) as bar:
-            with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
-                # Bind simulator instance to the worker function
-                worker = partial(_run_simulation_task, simulator=self.simulator)
-
-                # Submit all tasks and update progress bar as they complete
-                futures = [executor.submit(worker, task) for task in tasks]
-                for future in concurrent.futures.as_completed(futures):
+            # The simulator is handed to each worker once at startup, tasks only carry (route_key, job_size, job_id)
+            with multiprocessing.Pool(max_workers, initializer=_init_worker, initargs=(self.simulator,)) as pool:
+                # Tasks go out in chunks so the pickling and IPC cost is paid per chunk, not per task,
+                # and the progress bar updates as results come back
+                chunksize = max(1, len(tasks) // (max_workers * 8))
+                for _ in pool.imap_unordered(_run_simulation_task, tasks, chunksize=chunksize):
                     bar.update(1)
-                    future.result()  # Raise exceptions if any
 
         return True
 
@@ -133,7 +175,12 @@ class DataGenerator:
         Returns:
             DataFrame containing all simulation results with emissions data
         """
-        data_list = []
+        # Output columns, extended once per (route, job) block of forecasts instead of one dict per row
+        data = {col: [] for col in (
+            'source_node', 'destination_node', 'route_key', 'job_id', 'forecast_id', 'transfer_time', 'throughput',
+            'host_joules', 'link_joules', 'total_joules', 'carbon_emissions', 'job_deadline', 'source_cpu',
+            'source_ram', 'source_nic_speed', 'destination_cpu', 'destination_ram', 'destination_nic_speed'
+        )}
 
         # Get all unique source-destination pairs from traceroute data
         route_keys = list(self.simulator.traceroute_data.keys())
@@ -184,40 +231,32 @@ class DataGenerator:
                     throughput = (job_size_bytes * 8) / transfer_time_seconds  # bps (avoid division by zero)
                     total_energy = int(energy_json['total_energy_hosts']) + int(energy_json['total_link_energy'])
 
-                    # Calculate emissions for each forecast hour
-                    for fidx in forecast_idx:
-                        emissions = self.emissions_for_path_forecast(route_key, job['id'], fidx, energy_json)
-
-                        if emissions is None:
-                            click.secho(f"Warning: No emissions data for {route_key} job {job['id']} forecast {fidx}",
-                                        fg='yellow')
-                            bar.update(1)
-                            continue
-
-                        data_list.append({
-                            "source_node": source_node,
-                            "destination_node": destination_node,
-                            "route_key": route_key,
-                            "job_id": job['id'],
-                            "forecast_id": fidx,
-                            "transfer_time": transfer_time_seconds,
-                            "throughput": throughput,
-                            "host_joules": energy_json['total_energy_hosts'],
-                            "link_joules": energy_json['total_link_energy'],
-                            "total_joules": total_energy,
-                            "carbon_emissions": emissions,
-                            'job_deadline': job['deadline'],
-                            'source_cpu': self.node_map[source_node]['CPU'],
-                            'source_ram': self.node_map[source_node]['total_ram'],
-                            'source_nic_speed': self.node_map[source_node]['NIC_SPEED'],
-                            'destination_cpu': self.node_map[destination_node]['CPU'],
-                            'destination_ram': self.node_map[destination_node]['total_ram'],
-                            'destination_nic_speed': self.node_map[destination_node]['NIC_SPEED'],
-                        })
-                        bar.update(1)
+                    # Calculate emissions for each forecast hour, all start hours in one pass
+                    all_emissions = self.emissions_for_all_forecasts(route_key, job['id'], forecast_idx, energy_json)
+
+                    n = len(forecast_idx)
+                    data['source_node'].extend([source_node] * n)
+                    data['destination_node'].extend([destination_node] * n)
+                    data['route_key'].extend([route_key] * n)
+                    data['job_id'].extend([job['id']] * n)
+                    data['forecast_id'].extend(forecast_idx.tolist())
+                    data['transfer_time'].extend([transfer_time_seconds] * n)
+                    data['throughput'].extend([throughput] * n)
+                    data['host_joules'].extend([energy_json['total_energy_hosts']] * n)
+                    data['link_joules'].extend([energy_json['total_link_energy']] * n)
+                    data['total_joules'].extend([total_energy] * n)
+                    data['carbon_emissions'].extend(all_emissions.tolist())
+                    data['job_deadline'].extend([job['deadline']] * n)
+                    data['source_cpu'].extend([self.node_map[source_node]['CPU']] * n)
+                    data['source_ram'].extend([self.node_map[source_node]['total_ram']] * n)
+                    data['source_nic_speed'].extend([self.node_map[source_node]['NIC_SPEED']] * n)
+                    data['destination_cpu'].extend([self.node_map[destination_node]['CPU']] * n)
+                    data['destination_ram'].extend([self.node_map[destination_node]['total_ram']] * n)
+                    data['destination_nic_speed'].extend([self.node_map[destination_node]['NIC_SPEED']] * n)
+                    bar.update(n)
 
         # Create DataFrame and save results
-        associations_df = pd.DataFrame(data_list)
+        associations_df = pd.DataFrame(data)
 
         # Calculate additional metrics
         associations_df['throughput_gbps'] = associations_df['throughput'] / 1e9
@@ -234,6 +273,11 @@ class DataGenerator:
 
     def emissions_for_path_forecast(self, route_key, job_id, forecast_id, energy_data):
         """Calculate CO₂ emissions for a path forecast."""
+        return float(self.emissions_for_all_forecasts(route_key, job_id, [forecast_id], energy_data)[0])
+
+    def emissions_for_all_forecasts(self, route_key, job_id, forecast_ids, energy_data):
+        """CO₂ emissions of the path for every start forecast in forecast_ids, as an array in the same order.
+        Hop energies are resolved once and shared by all start hours."""
         # Get transfer duration
         transfer_duration = energy_data['transfer_duration']
         transfer_hours = transfer_duration / 3600
@@ -248,8 +292,9 @@ class DataGenerator:
         route_routers = self.routers_ip.get(route_key)
         route_links = self.links_ip.get(route_key)
 
-        total_emissions = 0.0
-
+        # Energy of each hop (host plus link joules) and the ci_table column of its ip
+        hop_energies = []
+        hop_ip_ids = []
         for i, hop in enumerate(traceroute):
             ip = hop.ip
             # Determine component names
@@ -266,32 +311,29 @@ class DataGenerator:
             # Get energy values
             host_energy = energy_data['hosts'].get(host_name)
             link_energy = energy_data['links'].get(link_name, 0.0)
-            total_energy = host_energy + link_energy
-
-            # Calculate hourly emissions
-            hourly_energy = total_energy / transfer_hours
-            hop_emissions = 0.0
-
-            for hour_offset in range(num_hours):
-                current_fidx = (forecast_id + hour_offset) % self.forecast_len
-
-                # Get CI data
-                ci_data = self.forecasts_df[
-                    (self.forecasts_df['forecast_idx'] == current_fidx) &
-                    (self.forecasts_df['ip'] == ip)
-                    ]
-
-                ci_value = ci_data.iloc[0]['ci']
-                if hour_offset == num_hours - 1:  # Partial last hour
-                    hour_frac = transfer_hours - (num_hours - 1)
-                    energy_kwh = (hourly_energy * hour_frac) / 3.6e6
-                else:
-                    energy_kwh = hourly_energy / 3.6e6
-
-                hop_emissions += energy_kwh * ci_value
-
-            total_emissions += hop_emissions
+            hop_energies.append(host_energy + link_energy)
+            if ip not in self.ip_ids:
+                raise ValueError(f"No carbon intensity forecast for ip {ip} on route {route_key}")
+            hop_ip_ids.append(self.ip_ids[ip])
+
+        forecast_ids = np.asarray(forecast_ids, dtype=np.int64)
+        hop_ip_ids = np.array(hop_ip_ids, dtype=np.int64)
+        # Every (hour, ip) cell the kernel reads must hold a forecast, a missing one would turn the emissions NaN
+        hours_used = np.unique((forecast_ids[:, None] + np.arange(num_hours)) % self.forecast_len)
+        missing = np.isnan(self.ci_table[np.ix_(hours_used, hop_ip_ids)])
+        if missing.any():
+            hour, hop = np.argwhere(missing)[0]
+            raise ValueError(
+                f"No carbon intensity forecast for ip {traceroute[hop].ip} at forecast_idx {hours_used[hour]} "
+                f"on route {route_key}"
+            )
+        hourly_energy = np.array(hop_energies, dtype=np.float64) / transfer_hours
+        hour_weights = np.ones(num_hours)
+        hour_weights[-1] = transfer_hours - (num_hours - 1)  # Partial last hour
+        total_emissions = _path_emissions(
+            self.ci_table, hop_ip_ids, hourly_energy, hour_weights, forecast_ids
+        )
 
-        if total_emissions is None or total_emissions == 0.0:
+        for forecast_id in forecast_ids[total_emissions == 0.0]:
             click.secho(f"{route_key}, {job_id}, {forecast_id}")
         return total_emissions
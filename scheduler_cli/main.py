@@ -1,12 +1,11 @@
 import json
-import math
 from pathlib import Path
 
 import click
+import numpy as np
 from generator import DataGenerator
 from scheduler_algo import Scheduler
 from scheduler_algo import PlanAlgorithm
-import random
 
 from zone_discovery import HistoricalForecastService
 
@@ -169,42 +168,40 @@ def generate_realistic_jobs(num_of_jobs, deadline_end=72):
         # }
     }
 
-    jobs = []
-    total_data = 0
-    for job_id in range(1, num_of_jobs + 1):
-        job_category = random.choices(
-            list(job_types.keys()),
-            weights=[v['weight'] for v in job_types.values()]
-        )[0]
-
-        params = job_types[job_category]
-
-        # Pick urgency level randomly (but weighted if you like)
-        urgency_level = random.choices(
-            ['urgent', 'standard', 'relaxed'],
-            weights=[0.4, 0.4, 0.2]
-        )[0]
-
-        deadline_range = params['urgency_profiles'][urgency_level]
-        if deadline_range[0] >= deadline_range[1]:
-            deadline = deadline_range[0]
-        else:
-            deadline = random.randint(*deadline_range)
-
-        # Log-distributed size
-        size = 10 ** random.uniform(
-            math.log10(params['size_range'][0]),
-            math.log10(params['size_range'][1])
-        )
-        total_data += size
-
-        jobs.append({
+    rng = np.random.default_rng()
+    categories = list(job_types.keys())
+    urgencies = ['urgent', 'standard', 'relaxed']
+
+    # Draw every job's category and urgency up front, then the per-job ranges
+    weights = np.array([v['weight'] for v in job_types.values()])
+    category_idx = rng.choice(len(categories), size=num_of_jobs, p=weights / weights.sum())
+    urgency_idx = rng.choice(len(urgencies), size=num_of_jobs, p=[0.4, 0.4, 0.2])
+
+    deadline_bounds = np.array([[job_types[c]['urgency_profiles'][u] for u in urgencies] for c in categories])
+    size_bounds = np.log10(np.array([job_types[c]['size_range'] for c in categories], dtype=float))
+    count_bounds = np.array([job_types[c]['count_range'] for c in categories])
+
+    deadline_lo = deadline_bounds[category_idx, urgency_idx, 0]
+    deadline_hi = np.maximum(deadline_bounds[category_idx, urgency_idx, 1], deadline_lo)
+    deadlines = rng.integers(deadline_lo, deadline_hi + 1)
+
+    # Log-distributed size
+    sizes = 10 ** rng.uniform(size_bounds[category_idx, 0], size_bounds[category_idx, 1])
+    files_counts = rng.integers(count_bounds[category_idx, 0], count_bounds[category_idx, 1] + 1)
+    total_data = float(sizes.sum())
+
+    jobs = [
+        {
             "id": job_id,
-            "bytes": int(size),
-            "files_count": random.randint(*params['count_range']),
+            "bytes": size,
+            "files_count": files_count,
             "deadline": deadline,
-            "type": f"{job_category}_{urgency_level}"
-        })
+            "type": f"{categories[c]}_{urgencies[u]}"
+        }
+        for job_id, size, files_count, deadline, c, u in zip(
+            range(1, num_of_jobs + 1), sizes.astype(np.int64).tolist(), files_counts.tolist(),
+            deadlines.tolist(), category_idx.tolist(), urgency_idx.tolist())
+    ]
 
     return jobs, total_data
 
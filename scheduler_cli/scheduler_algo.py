@@ -21,7 +21,8 @@ class Scheduler:
         self.node_map = read_in_node_list_to_map(node_file_path)
         click.secho(f"Loaded {len(self.node_list)} Nodes", fg="green")
         self.job_list = read_in_job_file(job_file_path)
-        self.associations_df = pd.read_csv(df_path)
+        # Arrow's multi-threaded CSV parser, the result is still a regular NumPy-backed frame for the planners
+        self.associations_df = pd.read_csv(df_path, engine='pyarrow')
         self.ci_matrix = None
         self.ip_forecast = []
 
@@ -1,5 +1,6 @@
 import os
 from typing import Dict, List
+import numpy as np
 import pandas as pd
 from rich.console import Console
 from rich.table import Table
@@ -24,6 +25,7 @@ class ScheduleVisualization:
         # Precompute job requirements
         self.job_requirements = {job['id']: job['bytes'] for job in self.job_list}
         self.total_bytes_required = sum(self.job_requirements.values())
+        self.job_deadlines = {job['id']: job.get('deadline', float('inf')) for job in self.job_list}
 
     def save_schedules(self):
         """Save all schedules to CSV files."""
@@ -63,56 +65,36 @@ class ScheduleVisualization:
 
     def _calculate_job_stats(self, schedule_df: pd.DataFrame) -> Dict:
         """Calculate job completion and deadline statistics."""
-        job_bytes_sent = self._calculate_bytes_sent(schedule_df)
-        completed_jobs = 0
-        completed_bytes = 0
-        deadline_met = 0
-
-        for job_id, bytes_sent in job_bytes_sent.items():
-            required_bytes = self.job_requirements.get(job_id, 0)
-
-            # Completion stats
-            if bytes_sent >= required_bytes * 0.99:  # 99% threshold
-                completed_jobs += 1
-            completed_bytes += min(bytes_sent, required_bytes)
-
-            # Deadline stats
-            job_schedule = schedule_df[schedule_df['job_id'] == job_id]
-            if not job_schedule.empty:
-                last_slot = job_schedule.iloc[-1]
-                job_deadline = next((j['deadline'] for j in self.job_list if j['id'] == job_id), float('inf'))
-                if (last_slot['forecast_id'] <= job_deadline and
-                        bytes_sent >= required_bytes * 0.99):
-                    deadline_met += 1
+        # Bytes sent (throughput bps * time s / 8) and last allocation slot per job in one grouped pass
+        per_job = schedule_df.assign(
+            bytes_sent=schedule_df['throughput'] * schedule_df['allocated_time'] / 8
+        ).groupby('job_id', sort=False).agg(
+            bytes_sent=('bytes_sent', 'sum'),
+            last_slot=('forecast_id', 'last')
+        )
+        bytes_sent = per_job['bytes_sent'].to_numpy()
+        required_bytes = per_job.index.map(lambda job_id: self.job_requirements.get(job_id, 0)).to_numpy(dtype=float)
+        job_deadlines = per_job.index.map(lambda job_id: self.job_deadlines.get(job_id, float('inf'))).to_numpy(dtype=float)
+
+        completed = bytes_sent >= required_bytes * 0.99  # 99% threshold
+        completed_jobs = int(completed.sum())
+        completed_bytes = np.minimum(bytes_sent, required_bytes).sum()
+        deadline_met = int((completed & (per_job['last_slot'].to_numpy() <= job_deadlines)).sum())
 
         return {
             'Jobs Completed': f"{completed_jobs}/{len(self.job_list)}",
             'Completion %': f"{completed_bytes / self.total_bytes_required:.1%}",
-            'Deadline Met': f"{deadline_met}/{len(job_bytes_sent)}",
-            'On Time %': f"{deadline_met / len(job_bytes_sent):.1%}" if job_bytes_sent else "0%"
+            'Deadline Met': f"{deadline_met}/{len(per_job)}",
+            'On Time %': f"{deadline_met / len(per_job):.1%}" if len(per_job) else "0%"
         }
 
-    def _calculate_bytes_sent(self, schedule_df: pd.DataFrame) -> Dict[int, float]:
-        """Calculate bytes sent for each job."""
-        job_bytes = {}
-
-        for _, row in schedule_df.iterrows():
-            job_id = row['job_id']
-            # Calculate bytes sent: throughput (bps) * time (s) / 8 = bytes
-            bytes_sent = (row['throughput'] * row['allocated_time']) / 8
-            job_bytes[job_id] = job_bytes.get(job_id, 0) + bytes_sent
-
-        return job_bytes
-
     def _calculate_efficiency_stats(self, schedule_df: pd.DataFrame, job_stats: Dict) -> Dict:
         """Improved efficiency metrics calculation"""
         total_carbon = schedule_df['carbon_emissions'].sum() / 1000
 
-        # Weight throughput by job size
-        weighted_throughput = sum(
-            row['throughput'] * (self.job_requirements[row['job_id']] / self.total_bytes_required)
-            for _, row in schedule_df.iterrows()
-        )
+        # Weight throughput by job size, as one dot product (jobs without a size weigh nothing)
+        job_bytes = schedule_df['job_id'].map(self.job_requirements).fillna(0).to_numpy(dtype=np.float64)
+        weighted_throughput = schedule_df['throughput'].to_numpy(dtype=np.float64) @ job_bytes / self.total_bytes_required
 
         # Calculate completed bytes properly
         completion_pct = float(job_stats['Completion %'].strip('%')) / 100
@@ -140,7 +122,7 @@ class ScheduleVisualization:
             table.add_column(col, justify="right")
 
         # Add rows
-        for _, row in comparison_df.iterrows():
+        for row in comparison_df.itertuples(index=False, name=None):
             table.add_row(*[str(x) for x in row])
 
         self.console.print(table)
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from algos.earliest_deadline_first import EarliestDeadlineFirst
+from algos.job_routes import first_pair_rows
+from algos.shortest_job_first import ShortestJobFirst
+
+
+def make_associations():
+    # The NaN route row of job 1 comes first, its old combined key matched (job 0, n1_n0)
+    rows = [
+        (1, np.nan, 0, 1.0),
+        (0, 'n0_n1', 0, 2.0),
+        (0, 'n1_n0', 0, 1.0),
+        (1, 'n0_n1', 0, 1.5),
+        (0, 'n0_n1', 1, 9.0),
+    ]
+    df = pd.DataFrame(rows, columns=['job_id', 'route_key', 'forecast_id', 'transfer_time_hours'])
+    return df.assign(
+        transfer_time=df['transfer_time_hours'] * 3600,
+        carbon_emissions=1.0,
+        throughput=100.0,
+        source_node='n0',
+        destination_node='n1'
+    )
+
+
+def test_first_pair_rows_skips_missing_routes():
+    first_idx, job_codes = first_pair_rows(make_associations())
+
+    assert first_idx.tolist() == [1, 2, 3]
+    assert job_codes.tolist() == [0, 0, 1]
+
+
+def test_planners_keep_every_valid_route():
+    df = make_associations()
+    job_list = [{'id': 0, 'bytes': 100, 'deadline': 1}, {'id': 1, 'bytes': 100, 'deadline': 1}]
+
+    for planner in (EarliestDeadlineFirst(df, job_list), ShortestJobFirst(df, job_list)):
+        assert set(planner.job_metrics[0]) == {'n0_n1', 'n1_n0'}
+        assert set(planner.job_metrics[1]) == {'n0_n1'}
+
+    # SJF keeps the fastest route first and the first row of a duplicate pair
+    sjf = ShortestJobFirst(df, job_list)
+    assert list(sjf.job_metrics[0]) == ['n1_n0', 'n0_n1']
+    assert sjf.job_metrics[0]['n0_n1'][4] == 2.0 * 3600
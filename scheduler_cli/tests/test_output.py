@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from algos.output import OutputFormatter
+
+
+def make_formatter(tmp_path):
+    job_list = [{'id': 0, 'bytes': 100.0}, {'id': 1, 'bytes': 200.0}, {'id': 2, 'bytes': 50.0}]
+    return OutputFormatter(job_list, ['node_a', 'node_b'], 24, pd.DataFrame(), output_dir=str(tmp_path))
+
+
+def test_unscheduled_job_keeps_int_counts(tmp_path):
+    formatter = make_formatter(tmp_path)
+    schedule_df = pd.DataFrame({
+        'job_id': [0, 0, 2],
+        'node': ['node_a', 'node_b', 'node_a'],
+        'forecast_id': [0, 1, 2],
+        'allocated_time': [10.0, 10.0, 5.0],
+        'throughput': [5.0, 5.0, 4.0],
+        'carbon_emissions': [1.0, 2.0, 0.5]
+    })
+
+    metrics = formatter.calculate_metrics(schedule_df)
+
+    assert metrics['unscheduled_jobs'] == [1]
+    assert set(metrics['job_metrics']) == {0, 2}
+    assert metrics['job_metrics'][0]['total_bytes'] == 100.0
+    assert metrics['job_metrics'][0]['nodes_used'] == 2
+    assert isinstance(metrics['job_metrics'][0]['nodes_used'], int)
+    assert [job['job_id'] for job in metrics['partially_scheduled_jobs']] == [2]
+    assert metrics['partially_scheduled_jobs'][0]['completion_percentage'] == 40.0
+    assert metrics['node_utilization']['node_a']['total_bytes'] == 70.0
+
+
+def test_empty_schedule_reports_every_job_unscheduled(tmp_path):
+    formatter = make_formatter(tmp_path)
+
+    for schedule_df in (pd.DataFrame(), pd.DataFrame(columns=['job_id', 'node', 'forecast_id', 'allocated_time',
+                                                               'throughput', 'carbon_emissions'])):
+        metrics = formatter.calculate_metrics(schedule_df)
+        summary = formatter.generate_summary_stats(metrics, 'test')
+
+        assert metrics['unscheduled_jobs'] == [0, 1, 2]
+        assert not metrics['job_metrics']
+        assert not metrics['partially_scheduled_jobs']
+        assert summary['scheduled_jobs'] == 0
+        assert summary['total_carbon'] == 0